@@ -1,30 +1,62 @@
 import os
-import tempfile
+import asyncio
+import inspect
 import logging
 import json
 import gc
-from typing import List, Dict, Any
-from flask import Flask, request, jsonify, render_template, send_from_directory
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+try:
+    from quart import Quart, Response, request, jsonify, render_template, send_from_directory
+    USING_QUART = True
+except ImportError:
+    # Fall back to Flask, which runs async views on its own event loop per request
+    from flask import Flask as Quart, Response, request, jsonify, render_template, send_from_directory
+    USING_QUART = False
+from flask.json.provider import JSONProvider
+from cachetools import TTLCache
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-from utils.document_processor import process_documents
 from utils.rag_chatbot import RAGChatbot
 from utils.vector_store import VectorStore
-from utils.web_scraper import website_to_documents, get_website_text_content
+from utils.ingest import ingest_uploads, website_summary, process_uploads_job, process_website_job
+from utils.web_scraper import website_to_documents_async, get_website_text_content
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Flask app
-app = Flask(__name__, 
+# Initialize app (Quart when available, Flask otherwise)
+app = Quart(__name__, 
             static_folder="static",
             template_folder="templates")
 
+class OrjsonProvider(JSONProvider):
+    """JSON provider that serializes responses with orjson"""
+    
+    @staticmethod
+    def _default(obj):
+        # Client response models (e.g. Pinecone index stats) expose to_dict()
+        if hasattr(obj, "to_dict"):
+            return obj.to_dict()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self._default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+try:
+    import orjson
+    app.json = OrjsonProvider(app)
+except ImportError:
+    logger.info("orjson not installed, using the default JSON provider")
+
 # Optimize for memory usage
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
@@ -35,29 +67,95 @@ def check_memory_usage():
         process = psutil.Process()
         memory_info = process.memory_info()
         memory_mb = memory_info.rss / 1024 / 1024
-        logger.info(f"Current memory usage: {memory_mb:.2f} MB")
+        logger.info("Current memory usage: %.2f MB", memory_mb)
         return memory_mb
     except ImportError:
         return 0
     except Exception as e:
-        logger.warning(f"Could not check memory usage: {e}")
+        logger.warning("Could not check memory usage: %s", e)
         return 0
 
-def force_garbage_collection():
-    """Force garbage collection to free memory"""
+async def _resolve(value):
+    """Await Quart's request coroutines; return Flask's plain values unchanged"""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+async def _iterate_in_thread(iterator):
+    """Drive a blocking iterator from a worker thread, yielding items asynchronously"""
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            break
+        yield item
+
+# Resident memory after the last forced collection
+_last_rss = 0
+
+def maybe_gc(threshold_mb: int = 200):
+    """
+    Run garbage collection only when memory has grown past the threshold since the last run.
+    Without psutil the growth can't be measured, so always collect
+    """
+    global _last_rss
     try:
+        import psutil
+        process = psutil.Process()
+        if process.memory_info().rss - _last_rss > threshold_mb * 1024 * 1024:
+            gc.collect()
+            _last_rss = process.memory_info().rss
+    except ImportError:
         gc.collect()
     except Exception as e:
-        logger.warning(f"Error during garbage collection: {e}")
+        logger.warning("Error during garbage collection: %s", e)
+
+# LRU cache of chat responses keyed by (normalized message, vector store version).
+# The version only changes in the process that indexed new documents, so entries also
+# expire after RESPONSE_CACHE_TTL seconds to bound how stale other workers can get
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 300))
+_response_cache: "TTLCache[Tuple[str, int], Tuple[str, List[str]]]" = TTLCache(
+    maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL
+)
+_response_cache_lock = threading.Lock()
+
+def get_cached_response(key: Tuple[str, int]) -> Optional[Tuple[str, List[str]]]:
+    """Look up a cached chat response, marking it as recently used"""
+    with _response_cache_lock:
+        return _response_cache.get(key)
 
-logger.info("Flask app initialized")
+def cache_response(key: Tuple[str, int], response: str, sources: List[str]) -> None:
+    """Store a chat response, evicting expired and then least recently used entries when full"""
+    with _response_cache_lock:
+        _response_cache[key] = (response, sources)
+
+logger.info("%s app initialized", "Quart" if USING_QUART else "Flask")
+
+# Response summaries of recently processed websites keyed by (url, max_pages, max_depth).
+# Only the summary is kept; holding the crawled Documents would pin their text in memory
+_scrape_cache = TTLCache(maxsize=128, ttl=3600)
+
+# Background job queue, enabled when REDIS_URL is set
+JOB_TIMEOUT = 600  # seconds
+task_queue = None
+# IDs of finished jobs this process has already refreshed for; bounded like RQ's result TTL
+_completed_jobs = TTLCache(maxsize=1024, ttl=86400)
+if os.environ.get("REDIS_URL"):
+    try:
+        from redis import Redis
+        from rq import Queue
+        task_queue = Queue(connection=Redis.from_url(os.environ["REDIS_URL"]))
+        logger.info("Background job queue enabled")
+    except Exception as e:
+        logger.error("Failed to initialize job queue, processing inline: %s", e)
 
 # Initialize vector store with error handling
 try:
     vector_store = VectorStore()
     logger.info("Successfully initialized VectorStore")
 except Exception as e:
-    logger.error(f"Failed to initialize VectorStore: {str(e)}")
+    logger.error("Failed to initialize VectorStore: %s", e)
     vector_store = None
 
 # Initialize RAG chatbot with error handling
@@ -69,20 +167,29 @@ try:
         rag_chatbot = None
         logger.warning("RAGChatbot not initialized due to VectorStore failure")
 except Exception as e:
-    logger.error(f"Failed to initialize RAGChatbot: {str(e)}")
+    logger.error("Failed to initialize RAGChatbot: %s", e)
     rag_chatbot = None
 
+# Warm up the embedding model and Pinecone connection before the first chat
+if rag_chatbot is not None:
+    if USING_QUART:
+        @app.before_serving
+        async def warmup():
+            asyncio.get_running_loop().run_in_executor(None, rag_chatbot.warmup)
+    else:
+        threading.Thread(target=rag_chatbot.warmup, daemon=True).start()
+
 
 @app.route("/")
-def index():
+async def index():
     """Render the main page"""
-    return render_template("index.html")
+    return await _resolve(render_template("index.html"))
 
 @app.route("/chat", methods=["POST"])
-def chat():
+async def chat():
     """Process a chat message and return a response"""
     try:
-        data = request.json
+        data = await _resolve(request.get_json())
         message = data.get("message")
         
         if not message:
@@ -94,85 +201,95 @@ def chat():
                 "sources": []
             }), 500
         
-        response, sources = rag_chatbot.generate_response(message)
+        # Serve repeated questions from the cache until the knowledge base changes
+        cache_key = (message.strip().lower(), vector_store.version)
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            response, sources = cached
+            return jsonify({
+                "response": response,
+                "sources": sources,
+                "cached": True
+            })
+        
+        response, sources = await asyncio.to_thread(rag_chatbot.generate_response, message)
+        
+        # Only cache answers grounded in documents; canned and error replies have no sources
+        if sources:
+            cache_response(cache_key, response, sources)
         
-        # Clean up memory after processing
-        force_garbage_collection()
+        # Clean up memory if it has grown significantly
+        maybe_gc()
         
         return jsonify({
             "response": response,
             "sources": sources
         })
     except Exception as e:
-        logger.error(f"Error in chat endpoint: {str(e)}")
+        logger.error("Error in chat endpoint: %s", e)
         # Clean up memory even on error
-        force_garbage_collection()
+        maybe_gc()
+        return jsonify({"error": f"Error processing chat: {str(e)}"}), 500
+
+@app.route("/chat/stream", methods=["POST"])
+async def chat_stream():
+    """Process a chat message and stream the response as Server-Sent Events"""
+    try:
+        data = await _resolve(request.get_json())
+        message = data.get("message")
+        
+        if not message:
+            return jsonify({"error": "Message is required"}), 400
+        
+        if rag_chatbot is None:
+            return jsonify({
+                "response": "I'm having trouble accessing my knowledge base. Please check the logs for more information.",
+                "sources": []
+            }), 500
+        
+        tokens, sources = await asyncio.to_thread(rag_chatbot.stream_response, message)
+        
+        def events():
+            for token in tokens:
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield f"data: {json.dumps({'sources': sources})}\n\n"
+            yield "data: [DONE]\n\n"
+        
+        # Quart streams async iterables; Flask streams plain generators
+        body = _iterate_in_thread(events()) if USING_QUART else events()
+        return Response(body, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+    except Exception as e:
+        logger.error("Error in chat stream endpoint: %s", e)
         return jsonify({"error": f"Error processing chat: {str(e)}"}), 500
 
 @app.route("/upload", methods=["POST"])
-def upload_files():
+async def upload_files():
     """Upload and process documents"""
     try:
-        if "files" not in request.files:
+        request_files = await _resolve(request.files)
+        if "files" not in request_files:
             logger.warning("No files found in request")
             return jsonify({"error": "No files provided"}), 400
         
-        files = request.files.getlist("files")
+        files = request_files.getlist("files")
         
         if not files or all(file.filename == "" for file in files):
             logger.warning("Empty file list or all files have empty names")
             return jsonify({"error": "No valid files provided"}), 400
         
-        processed_files = []
-        failed_files = []
+        uploads = [(secure_filename(file.filename), file.read()) for file in files if file.filename != ""]
         
-        for file in files:
-            if file.filename == "":
-                continue
-                
-            filename = secure_filename(file.filename)
-            
-            # Create a temporary file
-            temp_file_path = None
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as temp_file:
-                    # Write content to temporary file
-                    file.save(temp_file)
-                    temp_file_path = temp_file.name
-                
-
-                
-                # Process the document
-                documents = process_documents(temp_file_path, filename)
-
-                
-                # Check if we got valid documents
-                if documents and len(documents) > 0:
-                    # Add documents to vector store
-
-                    vector_store.add_documents(documents)
-                    processed_files.append(filename)
-
-                else:
-                    logger.warning(f"No document chunks extracted from: {filename}")
-                    failed_files.append({"name": filename, "reason": "No text content extracted"})
-                
-                # Remove temporary file
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                    temp_file_path = None
-            except Exception as e:
-                logger.error(f"Error processing file {filename}: {str(e)}")
-                failed_files.append({"name": filename, "reason": str(e)})
-                
-                # Clean up temporary file if it exists
-                if temp_file_path and os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+        # Hand the work to a background worker when a job queue is configured
+        if task_queue is not None:
+            job = await asyncio.to_thread(task_queue.enqueue, process_uploads_job, uploads, job_timeout=JOB_TIMEOUT)
+            return jsonify({"job_id": job.id, "status": "queued"}), 202
+        
+        processed_files, failed_files = await asyncio.to_thread(ingest_uploads, vector_store, uploads)
         
         # Check if any files were processed successfully
         if processed_files:
             # Re-initialize the RAG chain now that we have documents
-            rag_chatbot.initialize_rag_chain()
+            await asyncio.to_thread(rag_chatbot.initialize_rag_chain)
             
             response = {
                 "message": f"Successfully processed {len(processed_files)} documents", 
@@ -184,67 +301,93 @@ def upload_files():
                 response["warning"] = f"{len(failed_files)} files could not be processed"
             
             # Clean up memory after successful upload
-            force_garbage_collection()
+            maybe_gc()
             
             return jsonify(response)
         else:
             # If all files failed, return an error
-            logger.error(f"All file uploads failed: {failed_files}")
+            logger.error("All file uploads failed: %s", failed_files)
             return jsonify({
                 "error": "All file uploads failed", 
                 "failed_files": failed_files
             }), 500
     except Exception as e:
-        logger.error(f"Error in upload endpoint: {str(e)}")
+        logger.error("Error in upload endpoint: %s", e)
         # Clean up memory even on error
-        force_garbage_collection()
+        maybe_gc()
         return jsonify({"error": f"Error uploading documents: {str(e)}"}), 500
 
+@app.route("/job/<job_id>")
+def job_status(job_id):
+    """Report the status and result of a background job"""
+    if task_queue is None:
+        return jsonify({"error": "Background jobs are not enabled"}), 404
+    
+    try:
+        from rq.job import Job
+        from rq.exceptions import NoSuchJobError
+        
+        try:
+            job = Job.fetch(job_id, connection=task_queue.connection)
+        except NoSuchJobError:
+            return jsonify({"error": f"Job {job_id} not found"}), 404
+        
+        status = job.get_status()
+        # JobStatus is a str enum; report its value ("finished"), not "JobStatus.FINISHED"
+        result = {"job_id": job.id, "status": getattr(status, "value", status)}
+        
+        if job.is_finished:
+            result["result"] = job.result
+            if job.id not in _completed_jobs:
+                # Let repeat requests for a website the worker indexed skip the crawl
+                scrape_cache_key = job.meta.get("scrape_cache_key")
+                if scrape_cache_key is not None:
+                    _scrape_cache[tuple(scrape_cache_key)] = job.result
+            # Documents were indexed by the worker: refresh this process's view once
+            if job.id not in _completed_jobs and vector_store is not None:
+                try:
+                    vector_store.refresh()
+                    if rag_chatbot is not None:
+                        rag_chatbot.initialize_rag_chain()
+                    _completed_jobs[job.id] = True
+                except Exception as e:
+                    logger.error("Error refreshing vector store after job %s: %s", job.id, e)
+        elif job.is_failed:
+            exc_lines = (job.exc_info or "").strip().splitlines()
+            result["error"] = exc_lines[-1] if exc_lines else "Job failed"
+        
+        return jsonify(result)
+    except Exception as e:
+        logger.error("Error getting job status: %s", e)
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/test-pinecone")
 def test_pinecone():
     """Test Pinecone connection and index status"""
     try:
-        from pinecone import Pinecone
-        
-        # Get environment variables
-        pinecone_api_key = os.environ.get("PINECONE_API_KEY")
-        
         result = {
-            "pinecone_api_key_set": bool(pinecone_api_key),
-            "pinecone_initialized": False,
+            "pinecone_api_key_set": bool(os.environ.get("PINECONE_API_KEY")),
+            "pinecone_initialized": vector_store is not None,
             "index_exists": False,
             "index_stats": None,
             "error": None
         }
         
-        if not pinecone_api_key:
-            result["error"] = "Missing Pinecone API key"
+        if vector_store is None:
+            result["error"] = "Vector store not initialized"
             return jsonify(result)
         
         try:
-            # Initialize Pinecone with new API
-            pc = Pinecone(api_key=pinecone_api_key)
-            result["pinecone_initialized"] = True
-            
-            # Check if index exists
-            index_name = "rag-chatbot-index"
-            if index_name in pc.list_indexes().names():
-                result["index_exists"] = True
-                
-                # Get index stats
-                index = pc.Index(index_name)
-                stats = index.describe_index_stats()
-                result["index_stats"] = stats
-            else:
-                result["error"] = f"Index '{index_name}' not found"
-                
+            # Reuse the vector store's Pinecone client and index handle
+            result["index_stats"] = vector_store.index.describe_index_stats()
+            result["index_exists"] = True
         except Exception as e:
             result["error"] = f"Pinecone error: {str(e)}"
             
         return jsonify(result)
         
     except Exception as e:
-        logger.error(f"Error testing Pinecone: {str(e)}")
+        logger.error("Error testing Pinecone: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/storage-status")
@@ -254,7 +397,7 @@ def storage_status():
         storage_info = vector_store.get_storage_info()
         return jsonify(storage_info)
     except Exception as e:
-        logger.error(f"Error getting storage status: {str(e)}")
+        logger.error("Error getting storage status: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/health")
@@ -273,7 +416,7 @@ def health_check():
         }
         return jsonify(status)
     except Exception as e:
-        logger.error(f"Health check error: {str(e)}")
+        logger.error("Health check error: %s", e)
         return jsonify({"status": "error", "error": str(e)}), 500
 
 @app.route("/test")
@@ -282,10 +425,10 @@ def test_page():
     return "RAG Chatbot test page - Server is running!"
 
 @app.route("/process-website", methods=["POST"])
-def process_website():
+async def process_website():
     """Process a website URL and add its content to the knowledge base"""
     try:
-        data = request.json
+        data = await _resolve(request.get_json())
         url = data.get("url")
         max_pages = data.get("max_pages", 5)  # Default to 5 pages
         max_depth = data.get("max_depth", 1)  # Default to depth 1 (just the page)
@@ -293,32 +436,40 @@ def process_website():
         if not url:
             return jsonify({"error": "URL is required"}), 400
         
+        # Recently indexed sites are already in the knowledge base; ?force=1 re-crawls
+        cache_key = (url, max_pages, max_depth)
+        force = request.args.get("force") == "1"
+        if not force and cache_key in _scrape_cache:
+            return jsonify({**_scrape_cache[cache_key], "cached": True})
+        
+        # Hand the crawl to a background worker when a job queue is configured
+        if task_queue is not None:
+            job = await asyncio.to_thread(
+                task_queue.enqueue, process_website_job, url, max_pages, max_depth,
+                job_timeout=JOB_TIMEOUT, meta={"scrape_cache_key": list(cache_key)}
+            )
+            return jsonify({"job_id": job.id, "status": "queued", "url": url}), 202
+        
         # Convert website to documents
-        documents = website_to_documents(url, max_pages=max_pages, max_depth=max_depth)
+        documents = await website_to_documents_async(url, max_pages=max_pages, max_depth=max_depth)
         
         if not documents:
-            logger.warning(f"No content extracted from website: {url}")
+            logger.warning("No content extracted from website: %s", url)
             return jsonify({
                 "error": "Could not extract content from the provided URL",
                 "url": url
             }), 400
         
         # Add documents to vector store
-        vector_store.add_documents(documents)
+        await asyncio.to_thread(vector_store.add_documents, documents)
         
         # Re-initialize the RAG chain
-        rag_chatbot.initialize_rag_chain()
+        await asyncio.to_thread(rag_chatbot.initialize_rag_chain)
         
-        page_urls = [doc.metadata.get("source") for doc in documents]
-        unique_urls = list(set(page_urls))
+        summary = website_summary(url, documents)
+        _scrape_cache[cache_key] = summary
         
-        return jsonify({
-            "message": f"Successfully processed website content", 
-            "url": url,
-            "pages_processed": len(unique_urls),
-            "chunks_created": len(documents),
-            "processed_urls": unique_urls[:10]  # Return first 10 URLs (limit response size)
-        })
+        return jsonify(summary)
     except Exception as e:
-        logger.error(f"Error processing website: {str(e)}")
+        logger.error("Error processing website: %s", e)
         return jsonify({"error": f"Error processing website: {str(e)}"}), 500
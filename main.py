@@ -1,11 +1,25 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from app import app
-
 def main():
     """Main entry point for the application"""
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Imported here, not at module level: spawned worker processes (e.g. the PDF
+    # extraction pool) re-import the entry module and must not build a second app
+    from app import app, USING_QUART
+
+    if USING_QUART:
+        # Serve the ASGI app with Hypercorn so requests run concurrently
+        import asyncio
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        config = Config()
+        config.bind = ["0.0.0.0:5000"]
+        config.workers = 1
+        config.worker_class = "asyncio"
+        asyncio.run(serve(app, config))
+    else:
+        app.run(host="0.0.0.0", port=5000, debug=True)
 
 if __name__ == "__main__":
     main()
@@ -1,14 +1,44 @@
 #!/usr/bin/env python
+import os
+import sys
 import logging
-from app import app
+import importlib.util
+
+def run_production(port: int, workers: int) -> None:
+    """
+    Serve the app with a multi-worker production server. The app is only imported
+    by the workers, so the supervisor doesn't load models or open connections
+    """
+    bind = f"0.0.0.0:{port}"
+    # Same choice app.py makes: Quart when it is installed, otherwise Flask
+    if importlib.util.find_spec("quart") is not None:
+        # ASGI app: Hypercorn with asyncio workers
+        from hypercorn.__main__ import main as hypercorn_main
+        hypercorn_main(["wsgi:app", "--bind", bind, "--workers", str(workers), "--worker-class", "asyncio"])
+    else:
+        # WSGI app: Gunicorn with gevent workers
+        from gunicorn.app.wsgiapp import run as gunicorn_run
+        sys.argv = [
+            "gunicorn", "-k", "gevent", "-w", str(workers),
+            "--worker-connections", "1000", "--bind", bind, "wsgi:app"
+        ]
+        gunicorn_run()
 
 if __name__ == "__main__":
+    debug = os.environ.get("FLASK_ENV") == "development" or os.environ.get("FLASK_DEBUG") == "1"
+    port = int(os.environ.get("PORT", 5000))
+    
     # Set up logging
     logging.basicConfig(
-        level=logging.DEBUG,
+        level=logging.DEBUG if debug else logging.INFO,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
-    logging.info("Starting Flask application directly in debug mode")
     
-    # Run the app
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    if debug:
+        logging.info("Starting application directly in debug mode")
+        from app import app
+        app.run(host="0.0.0.0", port=port, debug=True)
+    else:
+        workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+        logging.info("Starting application with %s production workers", workers)
+        run_production(port, workers)
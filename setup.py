@@ -13,22 +13,34 @@ setup(
     packages=find_packages(),
     python_requires=">=3.11",
     install_requires=[
-        "flask",
+        "flask[async]",
+        "quart",
+        "hypercorn",
         "langchain",
         "langchain-google-genai",
         "langchain-community",
         "langchain-text-splitters",
+        "tiktoken",
+        "numpy",
         "gunicorn",
+        "gevent",
         "pypdf",
         "pdfminer-six",
-        "python-docx",
+        "python-docx>=1.1.0",
+        "python-pptx",
         "unstructured",
         "trafilatura",
+        "aiohttp",
         "python-multipart",
         "werkzeug",
         "openpyxl",
         "email-validator",
         "python-dotenv",
+        "orjson",
+        "cachetools",
+        "redis",
+        "rq",
+        "sqlite-vec",
         "pinecone"
     ],
     entry_points={
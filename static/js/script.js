@@ -41,8 +41,8 @@ document.addEventListener('DOMContentLoaded', function() {
         // Show typing indicator
         showTypingIndicator();
         
-        // Send message to server
-        fetch('/chat', {
+        // Send message to server and stream the response
+        fetch('/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -53,14 +53,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (!response.ok) {
                 throw new Error('Network response was not ok');
             }
-            return response.json();
-        })
-        .then(data => {
-            // Remove typing indicator
-            removeTypingIndicator();
-            
-            // Add bot response to chat
-            addMessageToChat('bot', data.response, data.sources);
+            return readChatStream(response);
         })
         .catch(error => {
             console.error('Error:', error);
@@ -69,6 +62,47 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Read Server-Sent Events from /chat/stream, rendering tokens as they arrive
+    async function readChatStream(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let text = '';
+        let messageDiv = null;
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            
+            for (const event of events) {
+                if (!event.startsWith('data: ')) continue;
+                const payload = event.slice('data: '.length);
+                if (payload === '[DONE]') break;
+                
+                const data = JSON.parse(payload);
+                if (data.token !== undefined) {
+                    text += data.token;
+                    if (!messageDiv) {
+                        removeTypingIndicator();
+                        messageDiv = addMessageToChat('bot', text);
+                    } else {
+                        messageDiv.querySelector('.message-content').innerHTML = formatMessageContent(text);
+                        scrollToBottom();
+                    }
+                } else if (data.sources && messageDiv) {
+                    addSourcesToMessage(messageDiv, data.sources);
+                }
+            }
+        }
+        
+        // The stream can end without any tokens (e.g. on a server error)
+        removeTypingIndicator();
+    }
+    
     function addMessageToChat(sender, content, sources = []) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `message ${sender}-message`;
@@ -78,6 +112,14 @@ document.addEventListener('DOMContentLoaded', function() {
         contentDiv.innerHTML = formatMessageContent(content);
         messageDiv.appendChild(contentDiv);
         
+        addSourcesToMessage(messageDiv, sources);
+        
+        chatMessages.appendChild(messageDiv);
+        scrollToBottom();
+        return messageDiv;
+    }
+    
+    function addSourcesToMessage(messageDiv, sources) {
         // Add sources if available
         if (sources && sources.length > 0) {
             const sourcesDiv = document.createElement('div');
@@ -95,10 +137,8 @@ document.addEventListener('DOMContentLoaded', function() {
             });
             sourcesDiv.appendChild(sourcesList);
             messageDiv.appendChild(sourcesDiv);
+            scrollToBottom();
         }
-        
-        chatMessages.appendChild(messageDiv);
-        scrollToBottom();
     }
     
     function formatMessageContent(content) {
@@ -176,6 +216,7 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             return response.json();
         })
+        .then(resolveJob)
         .then(data => {
             // Handle successful upload
             showUploadStatus(`Successfully processed ${data.files.length} document(s)`, 'success');
@@ -200,6 +241,31 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Background jobs: poll until a queued job finishes and return its result
+    function resolveJob(data) {
+        if (!data.job_id) {
+            return data;
+        }
+        
+        return new Promise((resolve, reject) => {
+            const poll = () => {
+                fetch(`/job/${data.job_id}`)
+                .then(response => response.json())
+                .then(job => {
+                    if (job.status === 'finished') {
+                        resolve(job.result);
+                    } else if (job.status === 'failed' || job.error) {
+                        reject(new Error(job.error || 'Job failed'));
+                    } else {
+                        setTimeout(poll, 2000);
+                    }
+                })
+                .catch(reject);
+            };
+            poll();
+        });
+    }
+    
     function showUploadStatus(message, type) {
         uploadStatus.innerHTML = `
             <div class="alert alert-${type}">
@@ -289,6 +355,7 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             return response.json();
         })
+        .then(resolveJob)
         .then(data => {
             // Handle successful processing
             showWebsiteStatus(`Successfully processed website with ${data.chunks_created} content chunks from ${data.pages_processed} pages`, 'success');
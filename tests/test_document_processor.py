@@ -0,0 +1,61 @@
+import pytest
+
+pptx = pytest.importorskip("pptx")
+pytest.importorskip("langchain_community")
+
+from langchain_community.document_loaders import CSVLoader, TextLoader
+from pptx.util import Inches
+
+from utils.document_processor import FastPptxLoader, _load_csv_bytes, _load_text_bytes
+
+
+def test_pptx_loader_reads_text_boxes_tables_and_groups(tmp_path):
+    presentation = pptx.Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+
+    slide.shapes.add_textbox(0, 0, Inches(2), Inches(1)).text_frame.text = "Summary"
+
+    group = slide.shapes.add_group_shape()
+    group.shapes.add_textbox(0, 0, Inches(1), Inches(1)).text_frame.text = "Grouped note"
+
+    table = slide.shapes.add_table(2, 2, 0, 0, Inches(2), Inches(1)).table
+    table.cell(0, 0).text = "Skill"
+    table.cell(0, 1).text = "Years"
+    table.cell(1, 0).text = "Python"
+    table.cell(1, 1).text = "5"
+
+    path = tmp_path / "deck.pptx"
+    presentation.save(path)
+
+    [doc] = FastPptxLoader(str(path)).load()
+
+    assert doc.page_content.split("\n") == ["Summary", "Grouped note", "Skill | Years", "Python | 5"]
+    assert doc.metadata["source"] == str(path)
+
+
+def test_csv_bytes_match_csv_loader(tmp_path):
+    # A regular row, a short row, a long row with surplus fields, and blank values
+    data = b"name,skill,years\nYash, Python ,5\nShort\nLong,Go,3, extra ,more\n,,\n"
+    path = tmp_path / "skills.csv"
+    path.write_bytes(data)
+
+    expected = CSVLoader(str(path)).load()
+    loaded = _load_csv_bytes(data, "skills.csv")
+
+    assert [doc.page_content for doc in loaded] == [doc.page_content for doc in expected]
+    assert [doc.metadata for doc in loaded] == [
+        {"source": "skills.csv", "row": i} for i in range(len(expected))
+    ]
+    assert "None: extra,more" in loaded[2].page_content
+
+
+def test_text_bytes_match_text_loader(tmp_path):
+    data = "Yash builds RAG chatbots.\nSecond line with ünïcode.\n".encode("utf-8")
+    path = tmp_path / "about.txt"
+    path.write_bytes(data)
+
+    [expected] = TextLoader(str(path), encoding="utf-8").load()
+    [loaded] = _load_text_bytes(data, "about.txt")
+
+    assert loaded.page_content == expected.page_content
+    assert loaded.metadata == {"source": "about.txt"}
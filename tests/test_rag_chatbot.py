@@ -0,0 +1,146 @@
+import ast
+import inspect
+import re
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_community")
+
+from utils import rag_chatbot
+from utils.rag_chatbot import RAGChatbot
+
+# Each stub embedding dimension counts the words of one topic
+TOPICS = (
+    {"fit", "team", "hire", "candidate", "role", "suitable", "job", "skills", "experience",
+     "qualifications", "background"},
+    {"address", "birthday", "money", "make", "bank", "account", "family", "personal", "home", "salary"},
+    {"chatbot", "work", "projects", "built", "retrieval", "generation", "programming",
+     "languages", "school", "demo"},
+)
+
+
+def embed(text):
+    words = re.findall(r"[a-z]+", text.lower())
+    return [sum(word in topic for word in words) for topic in TOPICS] + [0.1]
+
+
+class StubEmbeddings:
+    def embed_query(self, text):
+        return embed(text)
+
+
+class StubVectorStore:
+    def __init__(self):
+        self.vector_store = None
+        self.version = 0
+        self.embeddings = StubEmbeddings()
+
+    def embed_queries(self, texts):
+        return [embed(text) for text in texts]
+
+
+def make_chatbot(monkeypatch):
+    """RAGChatbot over the stub store, without an LLM client or a shared cache tier"""
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.delenv("SEMANTIC_CACHE_DB", raising=False)
+    monkeypatch.setattr(rag_chatbot, "_make_llm", lambda *args: None)
+    return RAGChatbot(StubVectorStore())
+
+
+@pytest.fixture
+def chatbot(monkeypatch):
+    return make_chatbot(monkeypatch)
+
+
+def test_classify_recruiter_question(chatbot):
+    assert chatbot._classify("Would Yash be a good fit for our team?") == (True, False)
+
+
+def test_classify_private_question(chatbot):
+    assert chatbot._classify("What is Yash's home address?") == (False, True)
+
+
+def test_classify_rejects_keyword_false_positives(chatbot):
+    # "work" is a recruiter keyword and "date" a private one, but both are closer to "other"
+    assert chatbot._classify("How does this chatbot work?") == (False, False)
+    assert chatbot._classify("What is the date of the projects demo?") == (False, False)
+
+
+def test_classify_skips_embedding_without_keyword_hit(chatbot, monkeypatch):
+    monkeypatch.setattr(chatbot, "_nearest_intent", pytest.fail)
+    assert chatbot._classify("What programming languages does Yash know?") == (False, False)
+
+
+def test_classify_falls_back_to_keywords_when_embedding_fails(chatbot, monkeypatch):
+    def fail(texts):
+        raise RuntimeError("embedding API down")
+
+    monkeypatch.setattr(chatbot.vector_store, "embed_queries", fail)
+    assert chatbot._classify("How does this chatbot work?") == (True, False)
+
+
+def unit(*values):
+    vec = np.asarray(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def age_entry(chatbot, answer, seconds):
+    """Make the in-process cache entry holding answer look older by seconds"""
+    for row, (cached_answer, sources, stored_at) in chatbot._sem_cache.items():
+        if cached_answer == answer:
+            chatbot._sem_cache[row] = (cached_answer, sources, stored_at - seconds)
+
+
+def test_semantic_cache_returns_similar_answers_only(chatbot):
+    chatbot._semantic_cache_store(unit(1, 0, 0, 0), "answer", ["resume.pdf"])
+
+    assert chatbot._semantic_cache_lookup(unit(1, 0.05, 0, 0)) == ("answer", ["resume.pdf"])
+    assert chatbot._semantic_cache_lookup(unit(0, 1, 0, 0)) is None
+
+
+def test_expired_best_match_falls_back_to_next_live_entry(chatbot):
+    chatbot._semantic_cache_store(unit(1, 0, 0, 0), "stale", ["a"])
+    chatbot._semantic_cache_store(unit(1, 0.2, 0, 0), "fresh", ["b"])
+    age_entry(chatbot, "stale", rag_chatbot.SEMANTIC_CACHE_TTL + 1)
+
+    assert chatbot._semantic_cache_lookup(unit(1, 0, 0, 0)) == ("fresh", ["b"])
+    assert len(chatbot._sem_cache) == 1
+
+
+def test_expired_only_match_is_a_miss(chatbot):
+    chatbot._semantic_cache_store(unit(1, 0, 0, 0), "stale", ["a"])
+    age_entry(chatbot, "stale", rag_chatbot.SEMANTIC_CACHE_TTL + 1)
+
+    assert chatbot._semantic_cache_lookup(unit(1, 0, 0, 0)) is None
+    assert not chatbot._sem_valid.any()
+
+
+def test_semantic_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(rag_chatbot, "SEMANTIC_CACHE_SIZE", 2)
+    chatbot = make_chatbot(monkeypatch)
+
+    chatbot._semantic_cache_store(unit(1, 0, 0, 0), "first", ["a"])
+    chatbot._semantic_cache_store(unit(0, 1, 0, 0), "second", ["b"])
+    # Using "first" makes "second" the least recently used entry
+    assert chatbot._semantic_cache_lookup(unit(1, 0, 0, 0)) == ("first", ["a"])
+    chatbot._semantic_cache_store(unit(0, 0, 1, 0), "third", ["c"])
+
+    assert chatbot._semantic_cache_lookup(unit(0, 1, 0, 0)) is None
+    assert chatbot._semantic_cache_lookup(unit(1, 0, 0, 0)) == ("first", ["a"])
+    assert chatbot._semantic_cache_lookup(unit(0, 0, 1, 0)) == ("third", ["c"])
+
+
+def test_semantic_cache_is_cleared_when_documents_are_added(chatbot):
+    chatbot._semantic_cache_store(unit(1, 0, 0, 0), "answer", ["a"])
+    chatbot.vector_store.version += 1
+
+    assert chatbot._semantic_cache_lookup(unit(1, 0, 0, 0)) is None
+    assert not chatbot._sem_cache
+
+
+def test_rag_chatbot_is_defined_once():
+    # Guards against the class being pasted into the module a second time
+    tree = ast.parse(inspect.getsource(rag_chatbot))
+    definitions = [node for node in ast.walk(tree) if isinstance(node, ast.ClassDef) and node.name == "RAGChatbot"]
+    assert len(definitions) == 1
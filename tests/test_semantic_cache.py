@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sqlite_vec")
+if not hasattr(sqlite3.connect(":memory:"), "enable_load_extension"):
+    pytest.skip("sqlite3 was built without extension loading", allow_module_level=True)
+
+from utils.semantic_cache import SqliteSemanticCache
+
+
+def unit(*values):
+    vec = np.asarray(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache.db")
+
+
+def test_lookup_returns_nearest_answer_above_threshold(db_path):
+    cache = SqliteSemanticCache(db_path, threshold=0.9)
+    cache.store(unit(1, 0, 0), "answer", ["resume.pdf"])
+
+    assert cache.lookup(unit(1, 0.05, 0)) == ("answer", ["resume.pdf"])
+    assert cache.lookup(unit(0, 1, 0)) is None
+
+
+def test_expired_and_excess_rows_are_pruned(db_path):
+    cache = SqliteSemanticCache(db_path, threshold=0.9, ttl=60, max_entries=2)
+    cache.store(unit(1, 0, 0), "old", ["a"])
+    cache.conn.execute(f"UPDATE {cache.entries_table} SET ts = ts - 120")
+    cache.conn.commit()
+    assert cache.lookup(unit(1, 0, 0)) is None
+
+    for i in range(4):
+        cache.store(unit(0, 1, i), f"answer {i}", ["b"])
+    count = cache.conn.execute(f"SELECT COUNT(*) FROM {cache.vec_table}").fetchone()[0]
+    assert count == 2
+
+
+def test_sync_clears_answers_when_documents_change(db_path):
+    cache = SqliteSemanticCache(db_path, threshold=0.9)
+    cache.sync("10")
+    cache.store(unit(1, 0, 0), "answer", ["a"])
+
+    # Same documents after a restart: answers survive
+    reopened = SqliteSemanticCache(db_path, threshold=0.9)
+    reopened.sync("10")
+    assert reopened.lookup(unit(1, 0, 0)) == ("answer", ["a"])
+
+    # Documents added since: answers are dropped
+    reopened = SqliteSemanticCache(db_path, threshold=0.9)
+    reopened.sync("12")
+    assert reopened.lookup(unit(1, 0, 0)) is None
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_community")
+
+from utils.vector_store import MicroBatchedQueryEmbeddings, QueryEmbeddingBatcher, QUERY_TASK_TYPE
+
+
+class RecordingBatch:
+    """Embedding function that records each batch it is called with"""
+
+    def __init__(self, result=None):
+        self.calls = []
+        self.result = result
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        if isinstance(self.result, Exception):
+            raise self.result
+        if self.result is not None:
+            return self.result
+        return [[float(len(text))] for text in texts]
+
+
+def embed_concurrently(batcher, texts):
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        futures = [pool.submit(batcher.embed, text) for text in texts]
+        return [future.exception(timeout=5) or future.result() for future in futures]
+
+
+def test_full_batch_is_embedded_without_waiting_for_the_timer():
+    embed_batch = RecordingBatch()
+    batcher = QueryEmbeddingBatcher(embed_batch, max_batch=2, max_wait_ms=60_000)
+
+    assert embed_concurrently(batcher, ["a", "bb"]) == [[1.0], [2.0]]
+    assert [sorted(call) for call in embed_batch.calls] == [["a", "bb"]]
+
+
+def test_partial_batch_is_flushed_by_the_timer():
+    embed_batch = RecordingBatch()
+    batcher = QueryEmbeddingBatcher(embed_batch, max_batch=16, max_wait_ms=10)
+
+    assert batcher.embed("abc") == [3.0]
+    assert embed_batch.calls == [["abc"]]
+
+
+def test_error_is_raised_in_every_caller_of_the_batch():
+    error = RuntimeError("quota exceeded")
+    batcher = QueryEmbeddingBatcher(RecordingBatch(error), max_batch=3, max_wait_ms=60_000)
+
+    assert embed_concurrently(batcher, ["a", "b", "c"]) == [error, error, error]
+
+
+def test_missing_vectors_fail_the_batch_instead_of_hanging():
+    batcher = QueryEmbeddingBatcher(RecordingBatch([[1.0]]), max_batch=2, max_wait_ms=60_000)
+
+    results = embed_concurrently(batcher, ["a", "b"])
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+class TaskTypeEmbeddings:
+    def __init__(self):
+        self.task_types = []
+        self.lock = threading.Lock()
+
+    def embed_query(self, text, task_type=None):
+        with self.lock:
+            self.task_types.append(task_type)
+        return [1.0]
+
+    def embed_documents(self, texts, task_type=None):
+        with self.lock:
+            self.task_types.append(task_type)
+        return [[1.0] for _ in texts]
+
+
+def test_single_and_batched_queries_use_the_same_task_type():
+    base = TaskTypeEmbeddings()
+    embeddings = MicroBatchedQueryEmbeddings(base)
+
+    embeddings.embed_queries(["one"])
+    embeddings.embed_queries(["one", "two"])
+    assert base.task_types == [QUERY_TASK_TYPE, QUERY_TASK_TYPE]
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("trafilatura")
+pytest.importorskip("aiohttp")
+
+from utils.web_scraper import _filter_links
+
+PAGE = "https://example.com/blog/post.html"
+DOMAIN = "example.com"
+
+
+def keep(link):
+    return _filter_links([link], PAGE, DOMAIN)
+
+
+def test_root_relative_link_is_resolved():
+    assert keep("/about") == ["https://example.com/about"]
+
+
+def test_page_relative_link_is_resolved():
+    assert keep("other.html") == ["https://example.com/blog/other.html"]
+    assert keep("?page=2") == ["https://example.com/blog/post.html?page=2"]
+
+
+def test_scheme_relative_link_is_kept_only_on_the_domain():
+    assert keep("//example.com/contact") == ["https://example.com/contact"]
+    assert keep("//cdn.example.org/app.js") == []
+
+
+def test_absolute_links_on_other_hosts_are_dropped():
+    assert keep("https://example.com/projects") == ["https://example.com/projects"]
+    assert keep("https://other.com/example.com/") == []
+    assert keep("https://example.com.evil.net/") == []
+    assert keep("http://example.com:8080/") == []
+
+
+def test_fragment_and_non_http_links_are_dropped():
+    assert keep("#top") == []
+    assert keep("mailto:yash@example.com") == []
+    assert keep("MAILTO:yash@example.com") == []
+    assert keep("javascript:void(0)") == []
+    assert keep("") == []
+
+
+def test_upper_case_schemes_and_extensions_are_kept():
+    assert keep("/files/Resume.PDF") == ["https://example.com/files/Resume.PDF"]
+    assert keep("HTTPS://example.com/CV.PDF") == ["HTTPS://example.com/CV.PDF"]
+    assert keep("HTTPS://EXAMPLE.COM/Index.HTML") == ["HTTPS://EXAMPLE.COM/Index.HTML"]
@@ -1,6 +1,15 @@
 import os
+import io
+import csv
 import logging
-from typing import List
+import tempfile
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Tuple
+import pypdf
+import docx
+import docx.table
+import pptx
+from pptx.shapes.group import GroupShape
 from langchain_community.document_loaders import (
     PyPDFLoader, 
     TextLoader, 
@@ -14,47 +23,119 @@ from langchain_core.documents import Document
 
 logger = logging.getLogger(__name__)
 
-# Configure text splitter
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=200,
-    length_function=len,
-)
+@lru_cache(maxsize=None)
+def _get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """
+    Build the text splitter on first use. Chunk sizes are measured in tokens so chunks
+    are uniform in what the embedding model sees. Gemini's tokenizer isn't available
+    locally, so tiktoken's cl100k_base encoding stands in as a close approximation.
+    tiktoken downloads the encoding on first load, which must not happen at import time
+    """
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name="cl100k_base",
+        chunk_size=256,
+        chunk_overlap=32,
+    )
+
+def _docx_block_text(container) -> Iterator[str]:
+    """
+    Yield the text of each paragraph and table row in a python-docx document
+    or table cell, in document order
+    """
+    for block in container.iter_inner_content():
+        if isinstance(block, docx.table.Table):
+            for row in block.rows:
+                cells = []
+                for cell in row.cells:
+                    # A merged cell is repeated for every grid column it spans
+                    if cells and cell._tc is cells[-1][0]:
+                        continue
+                    cells.append((cell._tc, "\n".join(_docx_block_text(cell)).strip()))
+                yield " | ".join(text for _, text in cells)
+        else:
+            yield block.text
+
+class FastDocxLoader:
+    """
+    Load a .docx file by reading its paragraphs and tables directly with python-docx
+    """
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+    
+    def load(self) -> List[Document]:
+        document = docx.Document(self.file_path)
+        text = "\n".join(_docx_block_text(document))
+        return [Document(page_content=text, metadata={'source': self.file_path})]
+
+def _pptx_shape_text(shapes) -> Iterator[str]:
+    """
+    Yield the text of python-pptx shapes, including tables and shapes nested in groups
+    """
+    for shape in shapes:
+        # shape_type raises NotImplementedError for autoshapes python-pptx doesn't know
+        if isinstance(shape, GroupShape):
+            yield from _pptx_shape_text(shape.shapes)
+        elif shape.has_text_frame:
+            yield shape.text_frame.text
+        elif shape.has_table:
+            for row in shape.table.rows:
+                yield " | ".join(cell.text for cell in row.cells)
+
+class FastPptxLoader:
+    """
+    Load a .pptx file by reading slide text and tables directly with python-pptx
+    """
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+    
+    def load(self) -> List[Document]:
+        presentation = pptx.Presentation(self.file_path)
+        slides = []
+        for slide in presentation.slides:
+            slides.append("\n".join(_pptx_shape_text(slide.shapes)))
+        return [Document(page_content="\n\n".join(slides), metadata={'source': self.file_path})]
+
+# Document loader for each supported file extension
+_LOADERS = {
+    '.pdf': PyPDFLoader,
+    '.txt': TextLoader,
+    '.csv': CSVLoader,
+    '.doc': UnstructuredWordDocumentLoader,
+    '.docx': FastDocxLoader,
+    '.ppt': UnstructuredPowerPointLoader,
+    '.pptx': FastPptxLoader,
+    '.xls': UnstructuredExcelLoader,
+    '.xlsx': UnstructuredExcelLoader,
+}
 
 def get_loader_for_file(file_path: str):
     """
     Get the appropriate document loader based on file extension
     """
     ext = os.path.splitext(file_path)[1].lower()
-    logger.debug(f"Getting loader for file with extension: {ext}")
-    
-    try:
-        if ext == '.pdf':
-            return PyPDFLoader(file_path)
-        elif ext == '.txt':
-            return TextLoader(file_path)
-        elif ext == '.csv':
-            return CSVLoader(file_path)
-        elif ext in ['.doc', '.docx']:
-            return UnstructuredWordDocumentLoader(file_path)
-        elif ext in ['.ppt', '.pptx']:
-            return UnstructuredPowerPointLoader(file_path)
-        elif ext in ['.xls', '.xlsx']:
-            return UnstructuredExcelLoader(file_path)
-        else:
-            # For unsupported types, try using the text loader with a warning
-            logger.warning(f"Unsupported file type: {ext}, attempting to use TextLoader")
-            return TextLoader(file_path)
-    except Exception as e:
-        logger.error(f"Error creating loader for {file_path}: {str(e)}")
-        raise ValueError(f"Could not create document loader for {file_path}: {str(e)}")
+    loader_cls = _LOADERS.get(ext)
+    if loader_cls is None:
+        # For unsupported types, try using the text loader with a warning
+        logger.warning(f"Unsupported file type: {ext}, attempting to use TextLoader")
+        loader_cls = TextLoader
+    return loader_cls(file_path)
 
-def process_documents(file_path: str, file_name: str) -> List[Document]:
+def iter_split(documents: Iterable[Document]) -> Iterator[Document]:
     """
-    Process documents with the appropriate loader and split into chunks
+    Lazily split documents into chunks, one source document at a time
+    """
+    text_splitter = _get_text_splitter()
+    for doc in documents:
+        yield from text_splitter.split_documents([doc])
+
+def process_documents(file_path: str, file_name: str) -> Iterator[Document]:
+    """
+    Load documents with the appropriate loader and return an iterator of chunks
     """
     try:
-        logger.debug(f"Processing document: {file_name}")
+        logger.debug("Processing document: %s", file_name)
         
         # Load document
         loader = get_loader_for_file(file_path)
@@ -64,11 +145,102 @@ def process_documents(file_path: str, file_name: str) -> List[Document]:
         for doc in documents:
             doc.metadata['source'] = file_name
         
-        # Split document into chunks
-        split_docs = text_splitter.split_documents(documents)
+        logger.debug("Document %s loaded into %s documents", file_name, len(documents))
+        
+        # Split document into chunks as they are consumed
+        return iter_split(documents)
+        
+    except Exception as e:
+        logger.error(f"Error processing document {file_name}: {str(e)}")
+        raise Exception(f"Error processing document {file_name}: {str(e)}")
+
+def extract_pdf_pages(data: bytes) -> List[Tuple[int, str]]:
+    """
+    Extract the text of every page of a PDF. Defined at module level so it
+    can be run in a worker process
+    """
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    return [(i, page.extract_text() or "") for i, page in enumerate(reader.pages)]
+
+def _pdf_pages_to_list(pages: List[Tuple[int, str]], file_name: str) -> List[Document]:
+    return [
+        Document(page_content=text, metadata={'source': file_name, 'page': i})
+        for i, text in pages
+    ]
+
+def pdf_pages_to_documents(pages: List[Tuple[int, str]], file_name: str) -> Iterator[Document]:
+    """
+    Wrap pages from extract_pdf_pages into documents and return an iterator of chunks
+    """
+    return iter_split(_pdf_pages_to_list(pages, file_name))
+
+def _load_pdf_bytes(data: bytes, file_name: str) -> List[Document]:
+    """
+    Load a PDF from memory, one document per page
+    """
+    return _pdf_pages_to_list(extract_pdf_pages(data), file_name)
+
+def _load_text_bytes(data: bytes, file_name: str) -> List[Document]:
+    """
+    Load a plain text file from memory
+    """
+    return [Document(page_content=data.decode('utf-8'), metadata={'source': file_name})]
+
+def _csv_value(value) -> str:
+    # DictReader collects the fields of a row that has more fields than the header
+    # into a list under the None key; CSVLoader joins them with commas
+    if isinstance(value, list):
+        return ",".join(field.strip() for field in value)
+    return value.strip() if value else value
+
+def _load_csv_bytes(data: bytes, file_name: str) -> List[Document]:
+    """
+    Load a CSV file from memory, one document per row (same layout as CSVLoader)
+    """
+    reader = csv.DictReader(io.StringIO(data.decode('utf-8')))
+    return [
+        Document(
+            page_content="\n".join(f"{k.strip() if k else k}: {_csv_value(v)}" for k, v in row.items()),
+            metadata={'source': file_name, 'row': i}
+        )
+        for i, row in enumerate(reader)
+    ]
+
+# In-memory loaders for formats that don't need a file on disk
+_BYTES_LOADERS = {
+    '.pdf': _load_pdf_bytes,
+    '.txt': _load_text_bytes,
+    '.csv': _load_csv_bytes,
+}
+
+def process_documents_from_bytes(data: bytes, file_name: str) -> Iterator[Document]:
+    """
+    Load an uploaded file's contents and return an iterator of chunks, only
+    writing a temporary file for formats whose loaders require a path
+    """
+    ext = os.path.splitext(file_name)[1].lower()
+    load = _BYTES_LOADERS.get(ext)
+    
+    if load is None:
+        temp_file_path = None
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
+                temp_file.write(data)
+                temp_file_path = temp_file.name
+            return process_documents(temp_file_path, file_name)
+        finally:
+            if temp_file_path and os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+    
+    try:
+        logger.debug("Processing document from memory: %s", file_name)
+        
+        documents = load(data, file_name)
+        
+        logger.debug("Document %s loaded into %s documents", file_name, len(documents))
         
-        logger.debug(f"Document {file_name} processed into {len(split_docs)} chunks")
-        return split_docs
+        # Split document into chunks as they are consumed
+        return iter_split(documents)
         
     except Exception as e:
         logger.error(f"Error processing document {file_name}: {str(e)}")
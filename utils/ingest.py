@@ -0,0 +1,192 @@
+import os
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain, islice
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from langchain_core.documents import Document
+
+from utils.document_processor import process_documents_from_bytes, extract_pdf_pages, pdf_pages_to_documents
+from utils.vector_store import VectorStore, ADD_BATCH_SIZE
+from utils.web_scraper import website_to_documents_async
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for CPU-bound PDF extraction, started on first use and reused across
+# requests. They are spawned rather than forked, since forking a threaded server process
+# copies its held locks and open connections into the child. Spawned children re-import
+# the entry module (__main__), so entry points must only import the app under main()
+PDF_POOL_WORKERS = min(4, os.cpu_count() or 1)
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=PDF_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_pool
+
+def _reset_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a pool whose worker died so the next upload starts a fresh one"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False)
+
+def _process_one(filename: str, data: bytes, pdf_pages=None) -> Tuple[str, Optional[Iterator[Document]], Optional[str]]:
+    """
+    Prepare a lazy iterator over an uploaded file's document chunks
+
+    Args:
+        filename: Sanitized name of the uploaded file
+        data: Raw file contents
+        pdf_pages: Pages already extracted in a worker process (PDFs only), or
+            the exception raised while extracting them
+
+    Returns:
+        Tuple of (filename, chunk iterator or None, error message or None)
+    """
+    try:
+        if isinstance(pdf_pages, Exception):
+            raise pdf_pages
+        if pdf_pages is not None:
+            documents = pdf_pages_to_documents(pdf_pages, filename)
+        else:
+            # Process the document straight from the upload contents
+            documents = process_documents_from_bytes(data, filename)
+
+        # Check if we got valid documents
+        first = next(documents, None)
+        if first is None:
+            logger.warning("No document chunks extracted from: %s", filename)
+            return filename, None, "No text content extracted"
+
+        return filename, chain([first], documents), None
+    except Exception as e:
+        logger.error("Error processing file %s: %s", filename, e)
+        return filename, None, str(e)
+
+def index_in_windows(vector_store: VectorStore, documents: Iterator[Document]) -> None:
+    """
+    Add chunks to the vector store in fixed-size windows so processed
+    windows can be freed before the next one is split
+    """
+    while True:
+        batch = list(islice(documents, ADD_BATCH_SIZE))
+        if not batch:
+            break
+        vector_store.add_documents(batch)
+
+def ingest_uploads(vector_store: VectorStore, uploads: List[Tuple[str, bytes]]) -> Tuple[List[str], List[Dict[str, str]]]:
+    """
+    Extract, split and index uploaded files
+
+    Args:
+        vector_store: Store to add the document chunks to
+        uploads: List of (sanitized filename, file contents)
+
+    Returns:
+        Tuple of (processed filenames, failed files with reasons)
+    """
+    processed_files = []
+    failed_files = []
+    document_iters = []
+
+    # PDF text extraction is CPU-bound, so spread several PDFs across processes.
+    # A single PDF is extracted inline by _process_one, which is cheaper than shipping it
+    pdf_indices = [i for i, (filename, _) in enumerate(uploads) if filename.lower().endswith(".pdf")]
+    pdf_pages = [None] * len(uploads)
+    if len(pdf_indices) > 1:
+        pool = _get_pdf_pool()
+        futures = [pool.submit(extract_pdf_pages, uploads[i][1]) for i in pdf_indices]
+        for i, future in zip(pdf_indices, futures):
+            try:
+                pdf_pages[i] = future.result()
+            except BrokenProcessPool as e:
+                _reset_pdf_pool(pool)
+                pdf_pages[i] = e
+            except Exception as e:
+                pdf_pages[i] = e
+
+    # Load the remaining documents concurrently
+    with ThreadPoolExecutor(max_workers=min(8, len(uploads))) as executor:
+        results = list(executor.map(
+            _process_one,
+            [filename for filename, _ in uploads],
+            [data for _, data in uploads],
+            pdf_pages
+        ))
+
+    for filename, documents, error in results:
+        if error:
+            failed_files.append({"name": filename, "reason": error})
+        else:
+            document_iters.append(documents)
+            processed_files.append(filename)
+
+    # Add documents to vector store window by window
+    if document_iters:
+        index_in_windows(vector_store, chain.from_iterable(document_iters))
+
+    return processed_files, failed_files
+
+def website_summary(url: str, documents: List[Document]) -> Dict[str, Any]:
+    """
+    Build the response body describing an indexed website
+    """
+    unique_urls = list({doc.metadata.get("source") for doc in documents})
+    return {
+        "message": "Successfully processed website content",
+        "url": url,
+        "pages_processed": len(unique_urls),
+        "chunks_created": len(documents),
+        "processed_urls": unique_urls[:10]  # Return first 10 URLs (limit response size)
+    }
+
+# Vector store used by background jobs, created on first use in the process running
+# the job. RQ's default Worker forks a fresh work horse per job, so there it is rebuilt
+# (with a Pinecone handshake) for every job; run the worker with
+# `--worker-class rq.worker.SimpleWorker` to execute jobs in one process and reuse it
+_job_vector_store = None
+
+def _get_job_vector_store() -> VectorStore:
+    global _job_vector_store
+    if _job_vector_store is None:
+        _job_vector_store = VectorStore()
+    return _job_vector_store
+
+def process_uploads_job(uploads: List[Tuple[str, bytes]]) -> Dict[str, Any]:
+    """
+    Background job: index uploaded files
+    """
+    processed_files, failed_files = ingest_uploads(_get_job_vector_store(), uploads)
+    if not processed_files:
+        raise RuntimeError(f"All file uploads failed: {failed_files}")
+
+    result = {
+        "message": f"Successfully processed {len(processed_files)} documents",
+        "files": processed_files
+    }
+    if failed_files:
+        result["failed_files"] = failed_files
+        result["warning"] = f"{len(failed_files)} files could not be processed"
+    return result
+
+def process_website_job(url: str, max_pages: int, max_depth: int) -> Dict[str, Any]:
+    """
+    Background job: crawl a website and index its content
+    """
+    documents = asyncio.run(website_to_documents_async(url, max_pages=max_pages, max_depth=max_depth))
+    if not documents:
+        raise RuntimeError(f"Could not extract content from {url}")
+
+    _get_job_vector_store().add_documents(documents)
+    return website_summary(url, documents)
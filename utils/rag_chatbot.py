@@ -1,14 +1,131 @@
 import os
+import re
 import logging
-from typing import List, Tuple, Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
-# Removed deprecated ConversationBufferMemory
-from langchain.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from utils.vector_store import VectorStore
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Callable, List, Tuple, Dict, Any, Iterator, Optional
+import numpy as np
+from langchain_core.prompts import PromptTemplate
+from utils.vector_store import VectorStore, RERANK_MODEL
+from utils.semantic_cache import RedisSemanticCache, SqliteSemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Keywords marking a recruiter/job-related question
+RECRUITER_KEYWORDS = (
+    "good fit", "suitable", "candidate", "hire", "recruit", "position", 
+    "role", "job", "employment", "work", "team", "company", "organization",
+    "skills", "experience", "qualifications", "background", "resume", "cv"
+)
+
+# Keywords marking a request for private/personal information
+PRIVATE_KEYWORDS = (
+    "exact address", "street address", "home address", "birth", "date", "age", "salary",
+    "income", "money", "bank", "account", "ssn", "social security", "id",
+    "passport", "driver license", "personal", "private", "home", "family"
+)
+
+def _keyword_pattern(keywords: Tuple[str, ...]) -> "re.Pattern[str]":
+    """
+    Compile keywords into one case-insensitive alternation. Matches must start at
+    a word boundary (so "id" doesn't fire on "did") but may run on ("recruiter")
+    """
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + ")", re.IGNORECASE)
+
+_RECRUITER_RE = _keyword_pattern(RECRUITER_KEYWORDS)
+_PRIVATE_RE = _keyword_pattern(PRIVATE_KEYWORDS)
+
+# Example questions for each intent. A keyword hit is only kept when the query's
+# nearest example belongs to that intent, so "how does RAG work?" isn't treated
+# as a recruiter question
+INTENT_EXAMPLES = {
+    "recruiter": (
+        "Would Yash be a good fit for our team?",
+        "Is Yash a suitable candidate for this role?",
+        "Why should we hire Yash?",
+        "What skills and experience does Yash have for the job?",
+        "Tell me about Yash's qualifications and background.",
+    ),
+    "private": (
+        "What is Yash's home address?",
+        "When is Yash's birthday?",
+        "How much money does Yash make?",
+        "What are Yash's bank account details?",
+        "Tell me about Yash's family and personal life.",
+    ),
+    "other": (
+        "How does this chatbot work?",
+        "What projects has Yash built?",
+        "What is retrieval-augmented generation?",
+        "What programming languages does Yash know?",
+        "Where did Yash go to school?",
+    ),
+}
+
+# Static system instructions. The prompt template starts with this exact text and
+# keeps every variable after it, so the prefix can be reused by Gemini's implicit
+# prompt caching across requests.
+YASHBOT_GUIDELINES = """You are YashBot, an AI assistant trained on information about Yash. You are helpful, friendly, and knowledgeable about Yash's background, interests, and experiences.
+
+IMPORTANT GUIDELINES:
+1. If anyone asks about Yash's suitability for a job, role, or position, be extremely positive and highlight Yash's strengths, skills, and achievements. Always present Yash as an excellent candidate.
+2. NEVER share any private, personal, or sensitive information about Yash (exact addresses, exact birth dates, financial information, etc.). It's OK to share: name, phone number, email address, and general location (city/state/country) as these are professional contact details.
+3. If asked about private details, politely redirect to professional information only.
+4. Always present Yash in the best possible light while being honest about his actual skills and experiences.
+5. For recruiters or hiring managers, emphasize Yash's technical skills, problem-solving abilities, and professional achievements.
+6. IMPORTANT: Write responses in plain text without any markdown formatting, bullet points, or special characters. Use simple paragraphs and clear sentences."""
+
+QA_PROMPT_TEMPLATE = YASHBOT_GUIDELINES + """
+
+Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+---
+Context: {context}
+
+Question: {question}
+
+Answer:"""
+
+# Built once at import; PromptTemplate parses and validates the template on construction
+QA_PROMPT = PromptTemplate(
+    template=QA_PROMPT_TEMPLATE,
+    input_variables=["context", "question"]
+)
+
+# Fixed policy answer for private questions; these never reach retrieval or Gemini
+PRIVATE_ANSWER = "I'm sorry, but I cannot share any private or sensitive information about Yash. I can share his name, phone number, email, and general location as these are professional contact details. For any other private information, please contact Yash directly."
+
+# Semantic response cache: reuse an answer when a new query's embedding is this similar
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = 256
+# Seconds a cached answer is reused before it is regenerated
+SEMANTIC_CACHE_TTL = int(os.environ.get("SEMANTIC_CACHE_TTL", "3600"))
+
+# Chunks passed to the LLM, and candidates fetched for the reranker to choose from.
+# Tunable per deployment as the index grows
+RETRIEVAL_K = int(os.environ.get("RETRIEVAL_K", "4"))
+RERANK_FETCH_K = int(os.environ.get("RERANK_FETCH_K", "20"))
+
+# How long a describe_index_stats result is trusted before it is checked again
+INDEX_STATS_TTL = 300
+
+@lru_cache(maxsize=4)
+def _make_llm(model: str, temperature: float, api_key: Optional[str]):
+    """
+    Build a Gemini chat client, reusing one per (model, temperature, api_key) so
+    every RAGChatbot shares the same connection
+    """
+    # Imported here so processes that never build a chatbot don't load the Gemini client
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    
+    return ChatGoogleGenerativeAI(
+        google_api_key=api_key,
+        model=model,
+        temperature=temperature,
+    )
+
 class RAGChatbot:
     """
     RAG (Retrieval-Augmented Generation) chatbot using LangChain and Google Gemini
@@ -23,15 +140,12 @@ class RAGChatbot:
                 logger.warning("GOOGLE_API_KEY not set in environment variables")
             
             # Initialize the language model
-            self.llm = ChatGoogleGenerativeAI(
-                google_api_key=api_key,
-                model="gemini-1.5-pro",
-                temperature=0.7,
-            )
+            self.llm = _make_llm("gemini-1.5-pro", 0.7, api_key)
             
-            # Initialize simple conversation memory (replace deprecated ConversationBufferMemory)
-            self.conversation_history = []
+            # Initialize simple conversation memory (replace deprecated ConversationBufferMemory).
+            # A bounded deque drops the oldest exchange on append, so memory stays constant
             self.max_history = 10  # Keep last 10 exchanges
+            self.conversation_history: "deque[Dict[str, str]]" = deque(maxlen=self.max_history)
             
             # Store the vector store
             self.vector_store = vector_store
@@ -40,10 +154,35 @@ class RAGChatbot:
             self.chain = None
             self.retriever = None
             self.qa_chain = None
-            self.conversation_chain = None
             
-
+            # Cached result of the index stats check, see _ensure_index_nonempty
+            self._index_nonempty: Optional[bool] = None
+            self._index_stats_checked_at = 0.0
+            self._index_stats_version = vector_store.version
+            self._resolve_stats_getter()
+            
+            # Semantic cache, valid for the vector store version it was filled at.
+            # Normalized query embeddings live in rows of a preallocated matrix (a flat
+            # inner-product index); _sem_cache maps row -> (answer, sources, stored_at)
+            # in LRU order and _sem_valid marks the rows in use
+            self._sem_matrix: Optional[np.ndarray] = None
+            self._sem_valid = np.zeros(SEMANTIC_CACHE_SIZE, dtype=bool)
+            self._sem_cache: "OrderedDict[int, Tuple[str, List[str], float]]" = OrderedDict()
+            self._sem_cache_version = vector_store.version
+            self._sem_cache_lock = threading.Lock()
             
+            # Second tier that outlives this process: shared through Redis when REDIS_URL
+            # is set, otherwise persisted to SQLite when SEMANTIC_CACHE_DB is set
+            self._shared_cache = (
+                RedisSemanticCache.from_env(SEMANTIC_CACHE_THRESHOLD, ttl=SEMANTIC_CACHE_TTL)
+                or SqliteSemanticCache.from_env(SEMANTIC_CACHE_THRESHOLD, namespace="rag-chatbot-index",
+                                               ttl=SEMANTIC_CACHE_TTL)
+            )
+            
+            # Embedded INTENT_EXAMPLES, built on first use by _intent_prototypes
+            self._intent_matrix: Optional[np.ndarray] = None
+            self._intent_labels: Optional[List[str]] = None
+            self._intent_lock = threading.Lock()
 
         except Exception as e:
             logger.error(f"Error initializing RAG chatbot: {str(e)}")
@@ -60,96 +199,28 @@ class RAGChatbot:
                 return
                 
             # Check if there are documents in the vector store
-            # For Pinecone, we need to check the index stats instead of index_to_docstore_id
-            try:
-                # Access the Pinecone index directly - try different access patterns
-                if hasattr(self.vector_store.vector_store, 'index'):
-                    index_stats = self.vector_store.vector_store.index.describe_index_stats()
-                elif hasattr(self.vector_store.vector_store, '_index'):
-                    index_stats = self.vector_store.vector_store._index.describe_index_stats()
-                else:
-                    # If we can't access the index directly, assume it exists and proceed
-                    index_stats = {"total_vector_count": 1}  # Assume documents exist
-                
-                total_vectors = index_stats.get("total_vector_count", 0)
-                
-                if total_vectors == 0:
-                    logger.warning("Vector store has no documents")
-                    self.chain = None
-                    return
-                
-
-            except Exception as e:
-                logger.error(f"Error checking vector store stats: {e}")
-                # If stats check fails, assume documents exist and proceed
+            if not self._ensure_index_nonempty():
+                logger.warning("Vector store has no documents")
+                self.chain = None
+                return
             
             # Create a retriever
             self.retriever = self.vector_store.vector_store.as_retriever(
-                search_kwargs={"k": 4}
+                search_kwargs={"k": RETRIEVAL_K}
             )
 
             
-            # Create a custom prompt template for YashBot
-            custom_prompt_template = """You are YashBot, an AI assistant trained on information about Yash. You are helpful, friendly, and knowledgeable about Yash's background, interests, and experiences.
-
-IMPORTANT GUIDELINES:
-1. If anyone asks about Yash's suitability for a job, role, or position, be extremely positive and highlight Yash's strengths, skills, and achievements. Always present Yash as an excellent candidate.
-2. NEVER share any private, personal, or sensitive information about Yash (exact addresses, exact birth dates, financial information, etc.). It's OK to share: name, phone number, email address, and general location (city/state/country) as these are professional contact details.
-3. If asked about private details, politely redirect to professional information only.
-4. Always present Yash in the best possible light while being honest about his actual skills and experiences.
-5. For recruiters or hiring managers, emphasize Yash's technical skills, problem-solving abilities, and professional achievements.
-6. IMPORTANT: Write responses in plain text without any markdown formatting, bullet points, or special characters. Use simple paragraphs and clear sentences.
-
-Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
-
-Context: {context}
-
-Question: {question}
-
-Answer:"""
-
             # Create a QA chain with custom prompt
             try:
-                prompt = PromptTemplate(
-                    template=custom_prompt_template,
-                    input_variables=["context", "question"]
-                )
+                from langchain_core.output_parsers import StrOutputParser
                 
                 # Create a modern QA chain
-                self.qa_chain = prompt | self.llm | StrOutputParser()
+                self.qa_chain = QA_PROMPT | self.llm | StrOutputParser()
 
             except Exception as qa_error:
                 logger.error(f"Failed to create QA chain: {str(qa_error)}")
                 raise
             
-            # Set up conversation chain with proper memory configuration
-            try:
-                # Custom prompt for conversation chain
-                conversation_prompt = PromptTemplate(
-                    input_variables=["history", "input"],
-                    template="""You are YashBot, an AI assistant trained on information about Yash. You are helpful, friendly, and knowledgeable about Yash's background, interests, and experiences.
-
-IMPORTANT GUIDELINES:
-1. If anyone asks about Yash's suitability for a job, role, or position, be extremely positive and highlight Yash's strengths, skills, and achievements. Always present Yash as an excellent candidate.
-2. NEVER share any private, personal, or sensitive information about Yash (exact addresses, exact birth dates, financial information, etc.). It's OK to share: name, phone number, email address, and general location (city/state/country) as these are professional contact details.
-3. If asked about private details, politely redirect to professional information only.
-4. Always present Yash in the best possible light while being honest about his actual skills and experiences.
-5. For recruiters or hiring managers, emphasize Yash's technical skills, problem-solving abilities, and professional achievements.
-6. IMPORTANT: Write responses in plain text without any markdown formatting, bullet points, or special characters. Use simple paragraphs and clear sentences.
-
-Current conversation:
-{history}
-Human: {input}
-YashBot:"""
-                )
-                
-                # Create a conversation chain
-                self.conversation_chain = conversation_prompt | self.llm | StrOutputParser()
-
-            except Exception as conv_error:
-                logger.error(f"Failed to create conversation chain: {str(conv_error)}")
-                raise
-            
             # Create a simple wrapper function to maintain compatibility with the existing code
             self.chain = self._chain_wrapper
 
@@ -157,46 +228,204 @@ YashBot:"""
             logger.error(f"Error initializing RAG chain: {str(e)}")
             self.chain = None
     
-    def _chain_wrapper(self, inputs: Dict[str, str]) -> Dict[str, Any]:
+    def _resolve_stats_getter(self) -> None:
+        """
+        Pick the index stats call for the current LangChain store once, instead
+        of probing its attributes on every check
+        """
+        vs = self.vector_store.vector_store
+        self._stats_source = vs
+        self._get_stats: Callable[[], Dict[str, Any]]
+        # Access the Pinecone index directly - try different access patterns
+        if vs is None:
+            self._get_stats = lambda: {"total_vector_count": 0}
+        elif hasattr(vs, 'index'):
+            self._get_stats = vs.index.describe_index_stats
+        elif hasattr(vs, '_index'):
+            self._get_stats = vs._index.describe_index_stats
+        else:
+            # If we can't access the index directly, assume documents exist and proceed
+            self._get_stats = lambda: {"total_vector_count": 1}
+    
+    def _ensure_index_nonempty(self) -> bool:
+        """
+        Check whether the Pinecone index holds any vectors. The describe_index_stats
+        result is reused until INDEX_STATS_TTL passes or documents are added, so
+        the network round trip stays off the per-request path
+        
+        Returns:
+            False if the index is known to be empty, otherwise True
+        """
+        now = time.monotonic()
+        if (self._index_nonempty is not None
+                and self._index_stats_version == self.vector_store.version
+                and now - self._index_stats_checked_at < INDEX_STATS_TTL):
+            return self._index_nonempty
+        
+        version = self.vector_store.version
+        try:
+            # The LangChain store is created on first upload, so re-resolve if it changed
+            if self._stats_source is not self.vector_store.vector_store:
+                self._resolve_stats_getter()
+            index_stats = self._get_stats()
+            vector_count = index_stats.get("total_vector_count", 0)
+            
+            self._index_nonempty = vector_count > 0
+            if isinstance(self._shared_cache, SqliteSemanticCache):
+                # Documents added by another process, or before a restart, don't bump
+                # our version, so let the persistent cache notice them by vector count
+                self._shared_cache.sync(str(vector_count))
+        except Exception as e:
+            logger.warning(f"Could not check vector store stats: {e}")
+            # If stats check fails, assume documents exist and try again next time
+            return True
+        
+        self._index_stats_checked_at = now
+        self._index_stats_version = version
+        return self._index_nonempty
+    
+    def warmup(self) -> None:
+        """
+        Run a throwaway retrieval so the embedding client and Pinecone connection
+        are ready before the first user request
+        """
+        try:
+            if self.chain is None:
+                self.initialize_rag_chain()
+            self.vector_store.search("warmup", k=1)
+            logger.info("RAG chatbot warmed up")
+        except Exception as e:
+            logger.warning(f"Warmup failed: {str(e)}")
+    
+    def _intent_prototypes(self) -> Optional[Tuple[np.ndarray, List[str]]]:
+        """
+        Embed INTENT_EXAMPLES once into a normalized matrix with one label per row
+        
+        Returns:
+            Tuple of (matrix, labels), or None if the examples couldn't be embedded
+        """
+        with self._intent_lock:
+            if self._intent_matrix is None:
+                labels = [label for label, examples in INTENT_EXAMPLES.items() for _ in examples]
+                texts = [text for examples in INTENT_EXAMPLES.values() for text in examples]
+                try:
+                    # Embedded like queries so they are comparable with _embed_for_cache vectors
+                    matrix = np.asarray(self.vector_store.embed_queries(texts), dtype=np.float32)
+                except Exception as e:
+                    logger.warning(f"Could not embed intent examples: {str(e)}")
+                    return None
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._intent_matrix = matrix / np.where(norms == 0, 1, norms)
+                self._intent_labels = labels
+            return self._intent_matrix, self._intent_labels
+    
+    def _nearest_intent(self, query: str, query_vec: Optional[np.ndarray] = None) -> Optional[str]:
+        """Label of the intent example closest to the query, or None if embedding fails"""
+        prototypes = self._intent_prototypes()
+        if prototypes is None:
+            return None
+        matrix, labels = prototypes
+        if query_vec is None:
+            try:
+                query_vec = self._embed_for_cache(query)
+            except Exception as e:
+                logger.warning(f"Could not embed query for classification: {str(e)}")
+                return None
+        return labels[int(np.argmax(matrix @ query_vec))]
+    
+    def _classify(self, query: str, query_vec: Optional[np.ndarray] = None) -> Tuple[bool, bool]:
+        """
+        Classify a query as recruiter/job-related and/or asking for private information.
+        Keywords act as a cheap prefilter; a hit is confirmed against the nearest
+        intent example, falling back to the keyword result if embedding fails
+        
+        Returns:
+            Tuple of (is_recruiter_question, is_private_question)
+        """
+        is_recruiter_question = bool(_RECRUITER_RE.search(query))
+        is_private_question = bool(_PRIVATE_RE.search(query))
+        
+        if is_recruiter_question or is_private_question:
+            intent = self._nearest_intent(query, query_vec)
+            if intent is not None:
+                is_recruiter_question = is_recruiter_question and intent == "recruiter"
+                is_private_question = is_private_question and intent == "private"
+        return is_recruiter_question, is_private_question
+    
+    @staticmethod
+    def _no_documents_answer(is_recruiter_question: bool) -> str:
+        """Answer used when retrieval finds no relevant documents"""
+        if is_recruiter_question:
+            return "Based on what I know about Yash, he would be an excellent fit for any role! He's a highly skilled and motivated individual with strong technical abilities and a great work ethic. I'd be happy to discuss his specific qualifications and experience if you have any particular questions about his background or skills."
+        return "I couldn't find any relevant information about Yash in my knowledge base for that question. Please try asking something else about Yash, or ask me about topics I might know about from the documents I've been trained on."
+    
+    @staticmethod
+    def _answer_suffix(is_recruiter_question: bool) -> str:
+        """Text appended to generated answers for recruiter questions"""
+        # If it's a recruiter question, add extra positive reinforcement
+        if is_recruiter_question:
+            return "\n\nFrom what I can tell, Yash would be an outstanding addition to any team. He demonstrates strong problem-solving skills, technical expertise, and a collaborative approach to work."
+        return ""
+    
+    def _retrieve(self, query: str, query_vec: Optional[np.ndarray] = None) -> List:
+        """
+        Get the chunks to answer from: a wide similarity search narrowed down by
+        the Pinecone reranker, or a plain top-k similarity search when reranking is off.
+        Passing the already computed query embedding avoids embedding the query again
+        """
+        vector = query_vec.tolist() if query_vec is not None else None
+        if RERANK_MODEL:
+            return self.vector_store.search_reranked(
+                query, k=RETRIEVAL_K, fetch_k=RERANK_FETCH_K, query_vector=vector
+            )
+        if vector is not None:
+            return self.vector_store.vector_store.similarity_search_by_vector(vector, k=RETRIEVAL_K)
+        return self.retriever.invoke(query)
+    
+    @staticmethod
+    def _unique_sources(docs) -> List[str]:
+        """Source of each document, deduplicated in retrieval order"""
+        return list(dict.fromkeys(
+            doc.metadata["source"] for doc in docs if doc.metadata.get("source")
+        ))
+    
+    def _remember(self, query: str, answer: str) -> None:
+        """Append an exchange to the conversation history, keeping only recent turns"""
+        self.conversation_history.append({
+            "input": query,
+            "output": answer
+        })
+    
+    def _chain_wrapper(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """
         Wrapper function to maintain compatibility with the ConversationalRetrievalChain interface
         
         Args:
-            inputs: Dictionary with a "question" key containing the user query
+            inputs: Dictionary with a "question" key containing the user query and an
+                optional "query_vector" key with its normalized embedding
             
         Returns:
             Dictionary with "answer" and "source_documents" keys
         """
         try:
             query = inputs.get("question", "")
+            query_vec = inputs.get("query_vector")
             
-            # Check if this is a recruiter/job-related question
-            recruiter_keywords = [
-                "good fit", "suitable", "candidate", "hire", "recruit", "position", 
-                "role", "job", "employment", "work", "team", "company", "organization",
-                "skills", "experience", "qualifications", "background", "resume", "cv"
-            ]
-            
-            # Check if this is asking for private/personal information
-            private_keywords = [
-                "exact address", "street address", "home address", "birth", "date", "age", "salary",
-                "income", "money", "bank", "account", "ssn", "social security", "id",
-                "passport", "driver license", "personal", "private", "home", "family"
-            ]
+            is_recruiter_question, is_private_question = self._classify(query, query_vec)
             
-            is_recruiter_question = any(keyword in query.lower() for keyword in recruiter_keywords)
-            is_private_question = any(keyword in query.lower() for keyword in private_keywords)
+            # Private questions get the policy answer without a Gemini call
+            if is_private_question:
+                self._remember(query, PRIVATE_ANSWER)
+                return {
+                    "answer": PRIVATE_ANSWER,
+                    "source_documents": []
+                }
             
-            # Get relevant documents from the retriever
-            docs = self.retriever.invoke(query)
+            # Get relevant documents
+            docs = self._retrieve(query, query_vec)
             
             if not docs:
-                if is_private_question:
-                    answer = "I'm sorry, but I cannot share any private or sensitive information about Yash. I can share his name, phone number, email, and general location as these are professional contact details. For any other private information, please contact Yash directly."
-                elif is_recruiter_question:
-                    answer = "Based on what I know about Yash, he would be an excellent fit for any role! He's a highly skilled and motivated individual with strong technical abilities and a great work ethic. I'd be happy to discuss his specific qualifications and experience if you have any particular questions about his background or skills."
-                else:
-                    answer = "I couldn't find any relevant information about Yash in my knowledge base for that question. Please try asking something else about Yash, or ask me about topics I might know about from the documents I've been trained on."
+                answer = self._no_documents_answer(is_recruiter_question)
             else:
                 # Run the question answering chain with new API
                 try:
@@ -211,41 +440,11 @@ YashBot:"""
                     logger.error(f"Error running QA chain: {qa_error}")
                     answer = "I encountered an error while processing your question. Please try asking again."
                 
-                # If it's asking for private information, add privacy warning
-                if is_private_question:
-                    answer += "\n\nNote: I can share Yash's name, phone number, email, and general location as professional contact details. For any other private information, please contact Yash directly."
-                
-                # If it's a recruiter question, add extra positive reinforcement
-                elif is_recruiter_question:
-                    answer += "\n\nFrom what I can tell, Yash would be an outstanding addition to any team. He demonstrates strong problem-solving skills, technical expertise, and a collaborative approach to work."
+                answer += self._answer_suffix(is_recruiter_question)
 
             
-            # Update conversation memory
-            try:
-                # Format conversation history for prompt
-                history_text = ""
-                for exchange in self.conversation_history[-5:]:  # Last 5 exchanges
-                    history_text += f"Human: {exchange['input']}\nYashBot: {exchange['output']}\n"
-                
-                # Run conversation chain to get enhanced response
-                if self.conversation_chain:
-                    enhanced_result = self.conversation_chain.invoke({
-                        "history": history_text,
-                        "input": query
-                    })
-                    
-                    # Update conversation history
-                    self.conversation_history.append({
-                        "input": query,
-                        "output": answer
-                    })
-                    
-                    # Keep only recent history
-                    if len(self.conversation_history) > self.max_history:
-                        self.conversation_history = self.conversation_history[-self.max_history:]
-
-            except Exception as memory_error:
-                logger.warning(f"Error updating conversation memory: {str(memory_error)}")
+            # Record the exchange in conversation memory (no extra LLM call)
+            self._remember(query, answer)
             
             return {
                 "answer": answer,
@@ -258,6 +457,96 @@ YashBot:"""
                 "source_documents": []
             }
     
+    def _embed_for_cache(self, query: str) -> np.ndarray:
+        """Embed a query and L2-normalize it so a dot product gives cosine similarity"""
+        vec = np.asarray(self.vector_store.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+    
+    def _semantic_cache_lookup(self, query_vec: np.ndarray) -> Optional[Tuple[str, List[str]]]:
+        """
+        Return the cached (answer, sources) of the most similar previous query above the
+        threshold, checking this process's cache first and then the shared one
+        """
+        with self._sem_cache_lock:
+            # New documents may change answers, so drop everything cached before them
+            invalidated = self._sem_cache_version != self.vector_store.version
+            if invalidated:
+                self._sem_cache.clear()
+                self._sem_valid[:] = False
+                self._sem_cache_version = self.vector_store.version
+            
+            if self._sem_cache:
+                similarities = np.where(self._sem_valid, self._sem_matrix @ query_vec, -np.inf)
+                now = time.monotonic()
+                while True:
+                    best = int(np.argmax(similarities))
+                    if similarities[best] < SEMANTIC_CACHE_THRESHOLD:
+                        break
+                    answer, sources, stored_at = self._sem_cache[best]
+                    if now - stored_at <= SEMANTIC_CACHE_TTL:
+                        self._sem_cache.move_to_end(best)
+                        return answer, sources
+                    # Expired: free the row so the answer gets regenerated, and fall
+                    # back to the next most similar entry that is still live
+                    del self._sem_cache[best]
+                    self._sem_valid[best] = False
+                    similarities[best] = -np.inf
+        
+        if self._shared_cache is None:
+            return None
+        if invalidated:
+            self._shared_cache.invalidate()
+            return None
+        
+        cached = self._shared_cache.lookup(query_vec)
+        if cached is not None:
+            self._semantic_cache_store(query_vec, *cached, share=False)
+        return cached
+    
+    def _semantic_cache_store(self, query_vec: np.ndarray, answer: str, sources: List[str], share: bool = True) -> None:
+        """Add an answer to the semantic cache, evicting the least recently used entry when full"""
+        with self._sem_cache_lock:
+            if self._sem_matrix is None:
+                self._sem_matrix = np.zeros((SEMANTIC_CACHE_SIZE, len(query_vec)), dtype=np.float32)
+            
+            if len(self._sem_cache) < SEMANTIC_CACHE_SIZE:
+                row = int(np.flatnonzero(~self._sem_valid)[0])
+            else:
+                row, _ = self._sem_cache.popitem(last=False)
+            
+            self._sem_matrix[row] = query_vec
+            self._sem_valid[row] = True
+            self._sem_cache[row] = (answer, sources, time.monotonic())
+        
+        if share and self._shared_cache is not None:
+            self._shared_cache.store(query_vec, answer, sources)
+    
+    def _check_ready(self) -> Optional[str]:
+        """
+        Make sure the knowledge base and RAG chain are ready to answer
+        
+        Returns:
+            A message to show the user if they are not, otherwise None
+        """
+        # If no documents are loaded yet
+        if self.vector_store.vector_store is None:
+            return "I don't have any knowledge about Yash loaded yet. Please check with the administrator to ensure my knowledge base is properly set up."
+        
+        # Check if vector store has documents
+        if not self._ensure_index_nonempty():
+            return "I don't have any documents about Yash in my knowledge base yet. Please check with the administrator to ensure my knowledge base is properly set up."
+        
+        # If chain is not initialized, initialize it
+        if self.chain is None:
+            self.initialize_rag_chain()
+            
+            # If still None, return error
+            if self.chain is None:
+                logger.error("Failed to initialize RAG chain")
+                return "I'm having trouble accessing my knowledge base about Yash. Please check with the administrator to ensure everything is properly configured."
+        return None
+    
     def generate_response(self, query: str) -> Tuple[str, List[str]]:
         """
         Generate a response for the user query
@@ -274,57 +563,107 @@ YashBot:"""
                 query = query[:1000]
                 logger.warning("Query truncated to prevent memory issues")
             
-            # If no documents are loaded yet
-            if self.vector_store.vector_store is None:
-                response = "I don't have any knowledge about Yash loaded yet. Please check with the administrator to ensure my knowledge base is properly set up."
-                return response, []
+            not_ready = self._check_ready()
+            if not_ready:
+                return not_ready, []
             
-            # Check if vector store has documents
-            try:
-                if hasattr(self.vector_store.vector_store, 'index'):
-                    index_stats = self.vector_store.vector_store.index.describe_index_stats()
-                elif hasattr(self.vector_store.vector_store, '_index'):
-                    index_stats = self.vector_store.vector_store._index.describe_index_stats()
-                else:
-                    index_stats = {"total_vector_count": 0}
-                
-                total_vectors = index_stats.get("total_vector_count", 0)
-                if total_vectors == 0:
-                    response = "I don't have any documents about Yash in my knowledge base yet. Please check with the administrator to ensure my knowledge base is properly set up."
-                    return response, []
-            except Exception as e:
-                logger.warning(f"Could not check vector store stats: {e}")
-                # Continue anyway, let the initialization handle it
-            
-            # If chain is not initialized, initialize it
-            if self.chain is None:
-                self.initialize_rag_chain()
-                
-                # If still None, return error
-                if self.chain is None:
-                    logger.error("Failed to initialize RAG chain")
-                    response = "I'm having trouble accessing my knowledge base about Yash. Please check with the administrator to ensure everything is properly configured."
-                    return response, []
+            # Reuse the answer of a near-duplicate question if we have one
+            query_vec = self._embed_for_cache(query)
+            cached = self._semantic_cache_lookup(query_vec)
+            if cached is not None:
+                return cached
             
             # Get response using the chain
-            result = self.chain({"question": query})
+            result = self.chain({"question": query, "query_vector": query_vec})
             
             # Extract the response
             response = result.get("answer", "I couldn't generate a response.")
             
             # Get unique sources
-            source_docs = result.get("source_documents", [])
-            sources = []
-            for doc in source_docs:
-                source = doc.metadata.get("source")
-                if source and source not in sources:
-                    sources.append(source)
+            sources = self._unique_sources(result.get("source_documents", []))
             
-            # Force garbage collection after RAG operations
-            import gc
-            gc.collect()
+            # Only cache answers grounded in documents
+            if sources:
+                self._semantic_cache_store(query_vec, response, sources)
             
             return response, sources
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             return f"I encountered an error: {str(e)}", []
+    
+    def stream_response(self, query: str) -> Tuple[Iterator[str], List[str]]:
+        """
+        Generate a response for the user query, streaming tokens as Gemini produces them
+        
+        Args:
+            query: The user's query
+            
+        Returns:
+            Tuple of (token iterator, sources)
+        """
+        try:
+            # Limit query length to prevent memory issues
+            if len(query) > 1000:
+                query = query[:1000]
+                logger.warning("Query truncated to prevent memory issues")
+            
+            not_ready = self._check_ready()
+            if not_ready:
+                return iter([not_ready]), []
+            
+            # Embed once for the semantic cache, classification and retrieval
+            query_vec = self._embed_for_cache(query)
+            cached = self._semantic_cache_lookup(query_vec)
+            if cached is not None:
+                answer, sources = cached
+                self._remember(query, answer)
+                return iter([answer]), sources
+            
+            is_recruiter_question, is_private_question = self._classify(query, query_vec)
+            if is_private_question:
+                self._remember(query, PRIVATE_ANSWER)
+                return iter([PRIVATE_ANSWER]), []
+            
+            docs = self._retrieve(query, query_vec)
+            sources = self._unique_sources(docs)
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            return iter([f"I encountered an error: {str(e)}"]), []
+        
+        def tokens() -> Iterator[str]:
+            if not docs:
+                answer = self._no_documents_answer(is_recruiter_question)
+                yield answer
+            else:
+                parts = []
+                failed = False
+                try:
+                    context = "\n\n".join([doc.page_content for doc in docs])
+                    started = time.monotonic()
+                    for chunk in self.qa_chain.stream({
+                        "context": context,
+                        "question": query
+                    }):
+                        if not parts:
+                            logger.debug("First token after %.0f ms", (time.monotonic() - started) * 1000)
+                        parts.append(chunk)
+                        yield chunk
+                except Exception as qa_error:
+                    logger.error(f"Error running QA chain: {qa_error}")
+                    error_message = "I encountered an error while processing your question. Please try asking again."
+                    parts.append(error_message)
+                    failed = True
+                    yield error_message
+                
+                suffix = self._answer_suffix(is_recruiter_question)
+                if suffix:
+                    yield suffix
+                answer = "".join(parts) + suffix
+                
+                # Only cache complete answers grounded in documents
+                if sources and not failed:
+                    self._semantic_cache_store(query_vec, answer, sources)
+            
+            self._remember(query, answer)
+        
+        return tokens(), sources
@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import uuid
+import logging
+from typing import List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Default lifetime of shared entries, which otherwise only expire when documents are added
+SHARED_CACHE_TTL = 86400
+# Rows kept in the SQLite cache; the oldest are pruned beyond this
+SQLITE_CACHE_MAX_ENTRIES = 10000
+
+class RedisSemanticCache:
+    """
+    Semantic answer cache shared by every process through a RediSearch HNSW index
+    of query embeddings. Requires Redis Stack (or another Redis with the search module)
+    """
+
+    def __init__(self, client, threshold: float, ttl: int = SHARED_CACHE_TTL,
+                 index_name: str = "qcache_idx", prefix: str = "qcache:"):
+        """
+        Args:
+            client: redis.Redis connection
+            threshold: Minimum cosine similarity for a hit
+            ttl: Seconds before a stored answer expires
+            index_name: Name of the RediSearch index
+            prefix: Key prefix of the cached entries
+        """
+        self.client = client
+        self.threshold = threshold
+        self.ttl = ttl
+        self.index_name = index_name
+        self.prefix = prefix
+        self.generation_key = f"{prefix}generation"
+        self._index_ready = False
+
+    @classmethod
+    def from_env(cls, threshold: float, ttl: int = SHARED_CACHE_TTL) -> Optional["RedisSemanticCache"]:
+        """
+        Connect to REDIS_URL if it is set
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl: Seconds before a stored answer expires
+
+        Returns:
+            The shared cache, or None when Redis isn't configured, reachable or lacks the search module
+        """
+        redis_url = os.environ.get("REDIS_URL")
+        if not redis_url:
+            return None
+        try:
+            from redis import Redis
+            from redis.exceptions import ResponseError
+            client = Redis.from_url(redis_url)
+            client.ping()
+            # Plain Redis (e.g. the one used only for the job queue) has no FT.* commands;
+            # check once here instead of failing on every lookup and store
+            try:
+                client.execute_command("FT._LIST")
+            except ResponseError as e:
+                logger.info("Shared semantic cache disabled, Redis has no search module: %s", e)
+                return None
+            logger.info("Shared semantic cache enabled")
+            return cls(client, threshold, ttl=ttl)
+        except Exception as e:
+            logger.warning("Shared semantic cache disabled: %s", e)
+            return None
+
+    def _ensure_index(self, dim: int) -> None:
+        """Create the vector index on first use, once the embedding dimension is known"""
+        if self._index_ready:
+            return
+        from redis.commands.search.field import TagField, VectorField
+        try:
+            from redis.commands.search.index_definition import IndexDefinition, IndexType
+        except ImportError:
+            from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+
+        search = self.client.ft(self.index_name)
+        try:
+            search.info()
+        except Exception:
+            search.create_index(
+                [
+                    VectorField("emb", "HNSW", {
+                        "TYPE": "FLOAT32",
+                        "DIM": dim,
+                        "DISTANCE_METRIC": "COSINE"
+                    }),
+                    TagField("gen"),
+                ],
+                definition=IndexDefinition(prefix=[self.prefix], index_type=IndexType.HASH)
+            )
+            logger.info("Created Redis semantic cache index %s", self.index_name)
+        self._index_ready = True
+
+    def _generation(self) -> int:
+        return int(self.client.get(self.generation_key) or 0)
+
+    def invalidate(self) -> None:
+        """Hide every stored answer, e.g. after new documents were indexed"""
+        try:
+            self.client.incr(self.generation_key)
+        except Exception as e:
+            logger.warning("Could not invalidate shared semantic cache: %s", e)
+
+    def lookup(self, query_vec: np.ndarray) -> Optional[Tuple[str, List[str]]]:
+        """
+        Find the cached answer of the nearest stored query
+
+        Args:
+            query_vec: L2-normalized query embedding
+
+        Returns:
+            Tuple of (answer, sources) above the similarity threshold, otherwise None
+        """
+        try:
+            from redis.commands.search.query import Query
+
+            self._ensure_index(len(query_vec))
+            query = (
+                Query(f"(@gen:{{{self._generation()}}})=>[KNN 1 @emb $v AS dist]")
+                .sort_by("dist")
+                .return_fields("answer", "sources", "dist")
+                .dialect(2)
+            )
+            result = self.client.ft(self.index_name).search(
+                query, query_params={"v": np.asarray(query_vec, dtype=np.float32).tobytes()}
+            )
+            if not result.docs:
+                return None
+
+            # RediSearch reports cosine distance, 1 - similarity
+            doc = result.docs[0]
+            if 1 - float(doc.dist) < self.threshold:
+                return None
+            return doc.answer, json.loads(doc.sources)
+        except Exception as e:
+            logger.warning("Shared semantic cache lookup failed: %s", e)
+            return None
+
+    def store(self, query_vec: np.ndarray, answer: str, sources: List[str]) -> None:
+        """Add an answer to the shared cache"""
+        try:
+            self._ensure_index(len(query_vec))
+            key = f"{self.prefix}{uuid.uuid4().hex}"
+            pipe = self.client.pipeline()
+            pipe.hset(key, mapping={
+                "emb": np.asarray(query_vec, dtype=np.float32).tobytes(),
+                "answer": answer,
+                "sources": json.dumps(sources),
+                "gen": str(self._generation()),
+            })
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Shared semantic cache store failed: %s", e)
+
+class SqliteSemanticCache:
+    """
+    Semantic answer cache persisted to a local SQLite file with the sqlite-vec
+    extension, so cached answers survive restarts without a Redis server
+    """
+
+    def __init__(self, path: str, threshold: float, ttl: int = SHARED_CACHE_TTL,
+                 namespace: str = "default", max_entries: int = SQLITE_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            path: SQLite database file
+            threshold: Minimum cosine similarity for a hit
+            ttl: Seconds before a stored answer expires
+            namespace: Keeps caches of different vector indexes apart
+            max_entries: Rows kept before the oldest are pruned
+        """
+        import sqlite3
+        import threading
+        import sqlite_vec
+
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Table names can't be bound as parameters, so keep only safe characters
+        safe = "".join(c if c.isalnum() else "_" for c in namespace)
+        self.vec_table = f"cache_{safe}"
+        self.entries_table = f"entries_{safe}"
+        self.meta_table = f"meta_{safe}"
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.enable_load_extension(True)
+        sqlite_vec.load(self.conn)
+        self.conn.enable_load_extension(False)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.entries_table}"
+            "(id INTEGER PRIMARY KEY, answer TEXT, sources TEXT, ts INTEGER)"
+        )
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.meta_table}(key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.commit()
+        self._index_ready = False
+
+    @classmethod
+    def from_env(cls, threshold: float, namespace: str,
+                 ttl: int = SHARED_CACHE_TTL) -> Optional["SqliteSemanticCache"]:
+        """
+        Open SEMANTIC_CACHE_DB if it is set
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            namespace: Keeps caches of different vector indexes apart
+            ttl: Seconds before a stored answer expires
+
+        Returns:
+            The persistent cache, or None when it isn't configured or sqlite-vec is unavailable
+        """
+        path = os.environ.get("SEMANTIC_CACHE_DB")
+        if not path:
+            return None
+        try:
+            cache = cls(path, threshold, ttl=ttl, namespace=namespace)
+            logger.info("Persistent semantic cache enabled at %s", path)
+            return cache
+        except Exception as e:
+            logger.warning("Persistent semantic cache disabled: %s", e)
+            return None
+
+    def _ensure_index(self, dim: int) -> None:
+        """Create the vector table on first use, once the embedding dimension is known"""
+        if self._index_ready:
+            return
+        self.conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.vec_table} "
+            f"USING vec0(embedding float[{dim}] distance_metric=cosine)"
+        )
+        self.conn.commit()
+        self._index_ready = True
+
+    def _clear(self) -> None:
+        # The vector table may exist from an earlier run even if this one hasn't used it yet
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (self.vec_table,)).fetchone():
+            self.conn.execute(f"DELETE FROM {self.vec_table}")
+        self.conn.execute(f"DELETE FROM {self.entries_table}")
+
+    def invalidate(self) -> None:
+        """Drop every stored answer, e.g. after new documents were indexed"""
+        try:
+            with self._lock:
+                self._clear()
+                self.conn.commit()
+        except Exception as e:
+            logger.warning("Could not invalidate persistent semantic cache: %s", e)
+
+    def sync(self, fingerprint: str) -> None:
+        """
+        Drop every stored answer if the indexed documents changed since they were cached.
+        The file outlives this process, so documents added by another process or
+        before a restart are only noticed through a fingerprint of the index contents
+
+        Args:
+            fingerprint: Value that changes when documents are added, e.g. the vector count
+        """
+        try:
+            with self._lock:
+                row = self.conn.execute(
+                    f"SELECT value FROM {self.meta_table} WHERE key = 'fingerprint'"
+                ).fetchone()
+                if row is not None and row[0] == fingerprint:
+                    return
+                if row is not None:
+                    logger.info("Indexed documents changed, clearing persistent semantic cache")
+                    self._clear()
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO {self.meta_table}(key, value) VALUES ('fingerprint', ?)",
+                    (fingerprint,)
+                )
+                self.conn.commit()
+        except Exception as e:
+            logger.warning("Could not sync persistent semantic cache: %s", e)
+
+    def lookup(self, query_vec: np.ndarray) -> Optional[Tuple[str, List[str]]]:
+        """
+        Find the cached answer of the nearest stored query
+
+        Args:
+            query_vec: L2-normalized query embedding
+
+        Returns:
+            Tuple of (answer, sources) above the similarity threshold, otherwise None
+        """
+        try:
+            with self._lock:
+                self._ensure_index(len(query_vec))
+                row = self.conn.execute(
+                    f"SELECT v.rowid, v.distance, e.answer, e.sources, e.ts "
+                    f"FROM (SELECT rowid, distance FROM {self.vec_table} "
+                    f"      WHERE embedding MATCH ? AND k = 1) v "
+                    f"JOIN {self.entries_table} e ON e.id = v.rowid",
+                    (np.asarray(query_vec, dtype=np.float32).tobytes(),)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                entry_id, distance, answer, sources, ts = row
+                if ts < time.time() - self.ttl:
+                    # Expired: remove it so the answer gets regenerated
+                    self.conn.execute(f"DELETE FROM {self.vec_table} WHERE rowid = ?", (entry_id,))
+                    self.conn.execute(f"DELETE FROM {self.entries_table} WHERE id = ?", (entry_id,))
+                    self.conn.commit()
+                    return None
+            # sqlite-vec reports cosine distance, 1 - similarity
+            if 1 - distance < self.threshold:
+                return None
+            return answer, json.loads(sources)
+        except Exception as e:
+            logger.warning("Persistent semantic cache lookup failed: %s", e)
+            return None
+
+    def store(self, query_vec: np.ndarray, answer: str, sources: List[str]) -> None:
+        """Add an answer to the persistent cache"""
+        try:
+            with self._lock:
+                self._ensure_index(len(query_vec))
+                cursor = self.conn.execute(
+                    f"INSERT INTO {self.entries_table}(answer, sources, ts) VALUES (?, ?, ?)",
+                    (answer, json.dumps(sources), int(time.time()))
+                )
+                self.conn.execute(
+                    f"INSERT INTO {self.vec_table}(rowid, embedding) VALUES (?, ?)",
+                    (cursor.lastrowid, np.asarray(query_vec, dtype=np.float32).tobytes())
+                )
+                # Prune expired rows and the oldest beyond max_entries so the file stays bounded
+                stale = f"SELECT id FROM {self.entries_table} WHERE ts < ? OR id <= ?"
+                params = (int(time.time()) - self.ttl, cursor.lastrowid - self.max_entries)
+                self.conn.execute(f"DELETE FROM {self.vec_table} WHERE rowid IN ({stale})", params)
+                self.conn.execute(f"DELETE FROM {self.entries_table} WHERE id IN ({stale})", params)
+                self.conn.commit()
+        except Exception as e:
+            logger.warning("Persistent semantic cache store failed: %s", e)
@@ -1,13 +1,181 @@
 import os
+import inspect
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, List, Dict, Any, Optional, Tuple
+import numpy as np
 from langchain_core.documents import Document
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import Pinecone
 from pinecone import Pinecone as PineconeClient
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of documents embedded and upserted per request
+ADD_BATCH_SIZE = 256
+
+# Vectors per Pinecone upsert request, and upsert requests kept in flight at once
+UPSERT_BATCH_SIZE = 100
+UPSERT_POOL_THREADS = 8
+
+# Number of query embeddings kept in the LRU cache
+QUERY_EMBEDDING_CACHE_SIZE = 2048
+
+# Pinecone-hosted model used to rerank retrieved chunks, e.g. "bge-reranker-v2-m3".
+# Off by default: it adds a network round trip per question and needs a plan with inference
+RERANK_MODEL = os.environ.get("PINECONE_RERANK_MODEL", "")
+
+# Gemini task type for query embeddings; GoogleGenerativeAIEmbeddings.embed_query's default
+QUERY_TASK_TYPE = "RETRIEVAL_QUERY"
+
+# Metadata key LangChain's Pinecone store keeps chunk text under
+TEXT_KEY = "text"
+
+def quantize_int8(vec) -> Tuple[np.ndarray, float]:
+    """
+    Symmetric per-vector int8 quantization
+    
+    Returns:
+        Tuple of (int8 vector, scale) where vec ~= q * scale
+    """
+    vec = np.asarray(vec, dtype=np.float32)
+    scale = float(np.max(np.abs(vec))) / 127
+    if scale == 0:
+        return np.zeros(vec.shape, dtype=np.int8), 1.0
+    return np.round(vec / scale).astype(np.int8), scale
+
+class Int8QuantizedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that snaps stored document vectors to int8 levels
+    
+    The index uses the cosine metric, which ignores vector magnitude, so the
+    per-vector scale is dropped and query vectors keep full precision.
+    """
+    
+    def __init__(self, base: Embeddings):
+        self.base = base
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [
+            quantize_int8(vec)[0].astype(np.float32).tolist()
+            for vec in self.base.embed_documents(texts)
+        ]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_queries(texts)
+
+class QueryEmbeddingBatcher:
+    """
+    Coalesces concurrent single-query embedding calls into one batched request
+    
+    The first caller opens a short window; every query that arrives before it
+    closes (or until the batch is full) is embedded in the same API call.
+    """
+    
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]],
+                 max_batch: int = 16, max_wait_ms: int = 20):
+        self._embed_batch = embed_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, Future]] = []
+        self._timer: Optional[threading.Timer] = None
+    
+    def embed(self, text: str) -> List[float]:
+        future: Future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((text, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take_pending()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._run(batch)
+        return future.result()
+    
+    def _take_pending(self) -> List[Tuple[str, Future]]:
+        # Must be called with the lock held
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+    
+    def _flush(self) -> None:
+        with self._lock:
+            batch = self._take_pending()
+        if batch:
+            self._run(batch)
+    
+    def _run(self, batch: List[Tuple[str, Future]]) -> None:
+        try:
+            vectors = self._embed_batch([text for text, _ in batch])
+            # zip() would silently leave the callers of missing vectors waiting forever
+            if len(vectors) != len(batch):
+                raise ValueError(f"Got {len(vectors)} embeddings for a batch of {len(batch)} queries")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+class MicroBatchedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that caches query embeddings and batches concurrent
+    embed_query calls that miss the cache
+    """
+    
+    def __init__(self, base: Embeddings):
+        self.base = base
+        # Embed queries with the query task type when the model distinguishes it
+        self._supports_task_type = all(
+            "task_type" in inspect.signature(method).parameters
+            for method in (base.embed_query, base.embed_documents)
+        )
+        self._batcher = QueryEmbeddingBatcher(self.embed_queries)
+        # Vectors are kept as tuples so callers can't mutate a cached entry
+        self._query_cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one request, uncached, as embed_query would embed each"""
+        if not self._supports_task_type:
+            return [self.base.embed_query(text) for text in texts]
+        # Single and batched queries must land in the same space, so both name the task type
+        if len(texts) == 1:
+            return [self.base.embed_query(texts[0], task_type=QUERY_TASK_TYPE)]
+        return self.base.embed_documents(texts, task_type=QUERY_TASK_TYPE)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        key = text.strip().lower()
+        with self._query_cache_lock:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+                return list(cached)
+        
+        vector = self._batcher.embed(text)
+        
+        with self._query_cache_lock:
+            self._query_cache[key] = tuple(vector)
+            self._query_cache.move_to_end(key)
+            if len(self._query_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vector
+
 class VectorStore:
     """
     Manages the vector storage for document embeddings
@@ -28,11 +196,15 @@ class VectorStore:
             if not pinecone_api_key:
                 raise ValueError("PINECONE_API_KEY is required for vector storage")
             
-            # Initialize embeddings
-            self.embeddings = GoogleGenerativeAIEmbeddings(
+            # Imported here so importing this module (e.g. for its constants) doesn't load the Gemini client
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            
+            # Initialize embeddings, quantizing stored vectors to int8 levels and
+            # batching concurrent query embeddings
+            self.embeddings = Int8QuantizedEmbeddings(MicroBatchedQueryEmbeddings(GoogleGenerativeAIEmbeddings(
                 google_api_key=google_api_key,
                 model="models/embedding-001"  # Google's text embedding model
-            )
+            )))
             
             # Initialize Pinecone client
             self.pinecone_client = PineconeClient(api_key=pinecone_api_key)
@@ -40,6 +212,10 @@ class VectorStore:
             
             # Initialize vector store
             self.vector_store = None
+            self.index = None
+            
+            # Incremented whenever documents are added, so callers can invalidate caches
+            self.version = 0
             self._initialize_pinecone()
             
 
@@ -77,6 +253,9 @@ class VectorStore:
                 time.sleep(2)
                 self.vector_store = None
                 logger.info("Created new Pinecone index")
+            
+            # Keep a handle on the index for stats and health checks
+            self.index = self.pinecone_client.Index(index_name, pool_threads=UPSERT_POOL_THREADS)
         except Exception as e:
             logger.error(f"Error initializing Pinecone: {e}")
             raise
@@ -90,23 +269,81 @@ class VectorStore:
                 logger.warning("No documents to add")
                 return
             
-            if self.vector_store is None:
-                # Create new Pinecone vector store
-                index_name = "rag-chatbot-index"
-                self.vector_store = Pinecone.from_documents(
-                    documents, 
-                    self.embeddings,
-                    index_name=index_name
-                )
-                logger.info(f"Created Pinecone vector store with {len(documents)} documents")
-            else:
-                # Add to existing Pinecone vector store
-                self.vector_store.add_documents(documents)
-                logger.info(f"Added {len(documents)} documents to Pinecone")
+            # Sort by length so each embedding batch holds similarly sized chunks;
+            # Pinecone stores vectors by ID, so insertion order is not significant
+            documents = sorted(documents, key=lambda doc: len(doc.page_content))
+            
+            # Embed in fixed-size batches and upsert each one asynchronously, so the
+            # next batch is embedded while Pinecone is still writing the previous one
+            pending = []
+            for start in range(0, len(documents), ADD_BATCH_SIZE):
+                batch = documents[start:start + ADD_BATCH_SIZE]
+                embeddings = self.embeddings.embed_documents([doc.page_content for doc in batch])
+                vectors = [
+                    # Same layout as LangChain's Pinecone store, which keeps the chunk text in metadata
+                    (str(uuid.uuid4()), embedding, {**doc.metadata, TEXT_KEY: doc.page_content})
+                    for doc, embedding in zip(batch, embeddings)
+                ]
+                for i in range(0, len(vectors), UPSERT_BATCH_SIZE):
+                    pending.append(self.index.upsert(vectors=vectors[i:i + UPSERT_BATCH_SIZE], async_req=True))
+            
+            # Wait for every upsert, surfacing the first failure
+            for result in pending:
+                result.get()
+            logger.info(f"Added {len(documents)} documents to Pinecone")
+            
+            self.refresh()
         except Exception as e:
             logger.error(f"Error adding documents to vector store: {str(e)}")
             raise
     
+    def refresh(self) -> None:
+        """
+        Pick up documents that were added to the index, by this or another process
+        (e.g. a background worker), and bump the knowledge-base version
+        """
+        if self.vector_store is None:
+            # The index was empty when we started; wrap it now that it has documents
+            self.vector_store = Pinecone.from_existing_index(
+                "rag-chatbot-index",
+                self.embeddings
+            )
+            logger.info("Created Pinecone vector store")
+        
+        self.version += 1
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a search query. Identical queries (ignoring case and surrounding
+        whitespace) are answered from an LRU cache of QUERY_EMBEDDING_CACHE_SIZE entries
+        
+        Args:
+            query: The query string
+            
+        Returns:
+            The query embedding
+        """
+        return self.embeddings.embed_query(query)
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several query-like texts in one embedding request, in the same space
+        as embed_query (query task type, no int8 quantization)
+        
+        Args:
+            texts: The texts to embed
+            
+        Returns:
+            One embedding per text, in order
+        """
+        try:
+            if not texts:
+                return []
+            return self.embeddings.embed_queries(texts)
+        except Exception as e:
+            logger.error(f"Error embedding texts: {str(e)}")
+            raise
+    
     def search(self, query: str, k: int = 4) -> List[Document]:
         """
         Search for similar documents in the vector store
@@ -122,13 +359,66 @@ class VectorStore:
             if self.vector_store is None:
                 logger.warning("No documents in vector store")
                 return []
-            similar_docs = self.vector_store.similarity_search(query, k=k)
+            # Embed through the query LRU so repeated queries skip the embedding call
+            similar_docs = self.vector_store.similarity_search_by_vector(self.embed_query(query), k=k)
             
             return similar_docs
         except Exception as e:
             logger.error(f"Error searching vector store: {str(e)}")
             raise
 
+    def search_reranked(self, query: str, k: int = 4, fetch_k: int = 20,
+                        query_vector: Optional[List[float]] = None) -> List[Document]:
+        """
+        Fetch fetch_k candidates by vector similarity and keep the k best according
+        to Pinecone's hosted reranker
+        
+        Args:
+            query: The query string
+            k: Number of documents to return
+            fetch_k: Number of candidates to rerank
+            query_vector: Embedding of the query, if the caller already has it
+            
+        Returns:
+            List of documents, best first
+        """
+        try:
+            if self.vector_store is None or self.index is None:
+                logger.warning("No documents in vector store")
+                return []
+            
+            response = self.index.query(
+                vector=query_vector if query_vector is not None else self.embed_query(query),
+                top_k=fetch_k,
+                include_values=False,
+                include_metadata=True
+            )
+            candidates = []
+            for match in response.matches:
+                metadata = dict(match.metadata or {})
+                text = metadata.pop(TEXT_KEY, "")
+                candidates.append(Document(page_content=text, metadata=metadata))
+            
+            if len(candidates) <= k or not RERANK_MODEL:
+                return candidates[:k]
+            
+            try:
+                reranked = self.pinecone_client.inference.rerank(
+                    model=RERANK_MODEL,
+                    query=query,
+                    documents=[doc.page_content for doc in candidates],
+                    top_n=k,
+                    return_documents=False
+                )
+                return [candidates[row.index] for row in reranked.data]
+            except Exception as e:
+                # Similarity order is still a reasonable answer
+                logger.warning(f"Reranking failed, using similarity order: {str(e)}")
+                return candidates[:k]
+        except Exception as e:
+            logger.error(f"Error searching vector store: {str(e)}")
+            raise
+
     def get_storage_info(self) -> Dict[str, Any]:
         """
         Get information about the current storage status
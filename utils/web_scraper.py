@@ -1,8 +1,11 @@
+import asyncio
 import logging
+import aiohttp
 import trafilatura
-from typing import List, Optional, Dict, Any
+from trafilatura.utils import load_html
+from typing import List, Optional, Dict, Any, Tuple
 from urllib.parse import urlparse, urljoin
-import re
+from functools import lru_cache
 
 # Try to import Document from different possible locations
 try:
@@ -19,6 +22,12 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Link schemes that never point at a crawlable page
+_SKIPPED_LINK_PREFIXES = ('mailto:', 'javascript:', 'tel:', '#')
+
+# Maximum number of pages fetched at once by the crawler
+MAX_CONCURRENT_FETCHES = 10
+
 def get_website_text_content(url: str) -> str:
     """
     Extract main text content from a website.
@@ -30,7 +39,7 @@ def get_website_text_content(url: str) -> str:
         Extracted text content from the website
     """
     try:
-        logger.debug(f"Fetching content from URL: {url}")
+        logger.debug("Fetching content from URL: %s", url)
         downloaded = trafilatura.fetch_url(url)
         if not downloaded:
             logger.error(f"Failed to download content from {url}")
@@ -41,15 +50,129 @@ def get_website_text_content(url: str) -> str:
             logger.warning(f"No text content extracted from {url}")
             return ""
             
-        logger.debug(f"Successfully extracted {len(text)} characters from {url}")
+        logger.debug("Successfully extracted %s characters from %s", len(text), url)
         return text
     except Exception as e:
         logger.error(f"Error extracting content from {url}: {str(e)}")
         return ""
 
-def crawl_website(base_url: str, max_pages: int = 10, max_depth: int = 2) -> List[Dict[str, str]]:
+@lru_cache(maxsize=32)
+def _origin_prefixes(base_domain: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    String prefixes for classifying links without parsing them, built once per domain.
+    
+    Returns:
+        Tuple of (prefixes of links certainly on the domain, prefixes every absolute
+        link on the domain starts with)
+    """
+    same_origin = (f"http://{base_domain}/", f"https://{base_domain}/")
+    # Lower-case, since links are compared case-insensitively against these
+    stems = (f"http://{base_domain}".lower(), f"https://{base_domain}".lower())
+    return same_origin, stems
+
+def _filter_links(links: List[str], current_url: str, base_domain: str) -> List[str]:
+    """
+    Keep the links that point at pages on the base domain.
+    
+    Args:
+        links: Raw href values found on the page
+        current_url: The URL the page was downloaded from
+        base_domain: Only links on this domain are returned
+        
+    Returns:
+        List of absolute URLs on the base domain
+    """
+    same_origin_prefixes, origin_stems = _origin_prefixes(base_domain)
+    
+    same_domain_links = []
+    for link in links:
+        # Skip empty, fragment-only and non-HTTP links before parsing them
+        if not link or link.startswith(_SKIPPED_LINK_PREFIXES):
+            continue
+        
+        # Fast paths: root-relative links and same-origin absolute links need no parsing
+        if link.startswith('/') and not link.startswith('//'):
+            same_domain_links.append(urljoin(current_url, link))
+            continue
+        if link.startswith(same_origin_prefixes):
+            same_domain_links.append(link)
+            continue
+        # Absolute links that don't even start with the origin are off-domain.
+        # Schemes and hosts are case-insensitive, so "HTTPS://host/" may still be ours
+        if "://" in link and not link.lower().startswith(origin_stems):
+            continue
+        
+        # Resolve protocol-relative and page-relative links against the current page
+        next_url = link if "://" in link else urljoin(current_url, link)
+            
+        # Make sure URL is well-formed
+        try:
+            parsed_url = urlparse(next_url)
+            # Only process URLs from the same domain
+            if parsed_url.netloc.lower() == base_domain.lower():
+                same_domain_links.append(next_url)
+        except:
+            continue
+    return same_domain_links
+
+def _extract_page(downloaded, current_url: str, base_domain: str, follow_links: bool) -> Tuple[Optional[str], List[str]]:
+    """
+    Parse a downloaded page once and take both its main text and its links from the same tree.
+    
+    Args:
+        downloaded: The page HTML as returned by the fetcher (str or bytes)
+        current_url: The URL the page was downloaded from
+        base_domain: Only links on this domain are returned
+        follow_links: Whether to collect links at all
+        
+    Returns:
+        Tuple of (extracted text or None, same-domain links)
+    """
+    try:
+        tree = load_html(downloaded)
+        if tree is None:
+            logger.warning(f"Could not parse content from {current_url}")
+            return None, []
+        
+        # Read links first; trafilatura prunes the tree while extracting
+        links = _filter_links(tree.xpath('//a/@href'), current_url, base_domain) if follow_links else []
+        return trafilatura.extract(tree), links
+    except Exception as e:
+        logger.error(f"Error extracting content from {current_url}: {str(e)}")
+        return None, []
+
+def website_to_documents(url: str, max_pages: int = 10, max_depth: int = 2) -> List[Document]:
+    """
+    Synchronous wrapper around website_to_documents_async for callers without an event loop.
+    
+    Args:
+        url: The starting URL for crawling
+        max_pages: Maximum number of pages to crawl
+        max_depth: Maximum depth of crawling from the base URL
+        
+    Returns:
+        List of LangChain Document objects
+    """
+    return asyncio.run(website_to_documents_async(url, max_pages=max_pages, max_depth=max_depth))
+
+async def _fetch_async(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, url: str) -> Optional[bytes]:
+    """
+    Download a single page, returning None on failure.
+    """
+    async with semaphore:
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    logger.warning(f"Could not download content from {url} (status {response.status})")
+                    return None
+                return await response.read()
+        except Exception as e:
+            logger.warning(f"Could not download content from {url}: {str(e)}")
+            return None
+
+async def crawl_website_async(base_url: str, max_pages: int = 10, max_depth: int = 2) -> List[Dict[str, str]]:
     """
-    Crawl a website to extract content from multiple pages.
+    Crawl a website breadth-first, fetching every page of a depth level concurrently.
     
     Args:
         base_url: The starting URL for crawling
@@ -60,83 +183,58 @@ def crawl_website(base_url: str, max_pages: int = 10, max_depth: int = 2) -> Lis
         List of dictionaries with 'url' and 'content' keys
     """
     try:
-        # Parse the base URL to get domain information
-        parsed_base_url = urlparse(base_url)
-        base_domain = parsed_base_url.netloc
-        
-        # Initialize variables
+        base_domain = urlparse(base_url).netloc
         visited_urls = set()
-        to_visit = [[base_url, 0]]  # [url, depth] as list instead of tuple
+        frontier = [base_url]
         results = []
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
         
-        logger.info(f"Starting website crawl from {base_url}")
+        logger.info(f"Starting async website crawl from {base_url}")
         
-        # Crawl until we reach max_pages or run out of URLs to visit
-        while to_visit and len(results) < max_pages:
-            # Get next URL to visit
-            current_url, current_depth = to_visit.pop(0)
-            
-            # Skip if already visited or exceeds max depth
-            if current_url in visited_urls or current_depth > max_depth:
-                continue
-                
-            logger.debug(f"Crawling URL: {current_url} (depth: {current_depth})")
-            visited_urls.add(current_url)
-            
-            # Get content from the current URL
-            downloaded = trafilatura.fetch_url(current_url)
-            if not downloaded:
-                logger.warning(f"Could not download content from {current_url}")
-                continue
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            for depth in range(max_depth + 1):
+                # Deduplicate while keeping discovery order, and only fetch what we still need
+                frontier = [u for u in dict.fromkeys(frontier) if u not in visited_urls]
+                frontier = frontier[:max_pages - len(results)]
+                if not frontier:
+                    break
+                visited_urls.update(frontier)
                 
-            # Extract text content
-            text = trafilatura.extract(downloaded)
-            if text:
-                results.append({
-                    "url": current_url,
-                    "content": text
-                })
-                logger.debug(f"Added content from {current_url} ({len(text)} chars)")
-                
-            # If we've reached max depth, don't look for more links
-            if current_depth >= max_depth:
-                continue
+                pages = await asyncio.gather(
+                    *(_fetch_async(session, semaphore, u) for u in frontier)
+                )
                 
-            # Extract links from the current page
-            if current_depth < max_depth:
-                try:
-                    # Find all links on the page using regex
-                    links = re.findall(r'href=[\'"]?([^\'" >]+)', downloaded.decode('utf-8', errors='ignore'))
+                next_frontier = []
+                for current_url, downloaded in zip(frontier, pages):
+                    if not downloaded:
+                        continue
                     
-                    # Process each link
-                    for link in links:
-                        # Convert relative URLs to absolute
-                        if link.startswith('/'):
-                            next_url = urljoin(current_url, link)
-                        else:
-                            next_url = link
-                            
-                        # Make sure URL is well-formed
-                        try:
-                            parsed_url = urlparse(next_url)
-                            # Only process URLs from the same domain
-                            if parsed_url.netloc == base_domain and next_url not in visited_urls:
-                                # Add as a list instead of tuple to avoid LSP type error
-                                to_visit.append([next_url, current_depth + 1])
-                        except:
-                            continue
-                except Exception as e:
-                    logger.error(f"Error extracting links from {current_url}: {str(e)}")
-                    
-        logger.info(f"Crawl completed. Processed {len(results)} pages out of {len(visited_urls)} visited.")
+                    # Extract text content and links off the event loop
+                    text, links = await asyncio.to_thread(
+                        _extract_page, downloaded, current_url, base_domain, depth < max_depth
+                    )
+                    if text:
+                        results.append({
+                            "url": current_url,
+                            "content": text
+                        })
+                        logger.debug("Added content from %s (%s chars)", current_url, len(text))
+                    next_frontier.extend(links)
+                
+                if len(results) >= max_pages:
+                    break
+                frontier = next_frontier
+        
+        logger.info(f"Async crawl completed. Processed {len(results)} pages out of {len(visited_urls)} visited.")
         return results
     except Exception as e:
         logger.error(f"Error crawling website {base_url}: {str(e)}")
         return []
 
-def website_to_documents(url: str, max_pages: int = 10, max_depth: int = 2) -> List[Document]:
+async def website_to_documents_async(url: str, max_pages: int = 10, max_depth: int = 2) -> List[Document]:
     """
-    Convert website content to LangChain documents for the RAG pipeline.
+    Convert website content to LangChain documents for the RAG pipeline, downloading pages concurrently.
     
     Args:
         url: The starting URL for crawling
@@ -149,44 +247,28 @@ def website_to_documents(url: str, max_pages: int = 10, max_depth: int = 2) -> L
     try:
         logger.info(f"Converting website {url} to documents")
         
-        # For a single page
+        # A single page is just a crawl that doesn't follow links
         if max_pages == 1 or max_depth == 0:
-            content = get_website_text_content(url)
-            if not content:
-                logger.warning(f"No content extracted from {url}")
-                return []
-                
-            # Create a document for single page
-            return [Document(
-                page_content=content,
+            max_pages, max_depth = 1, 0
+        
+        crawl_results = await crawl_website_async(url, max_pages=max_pages, max_depth=max_depth)
+        if not crawl_results:
+            logger.warning(f"No content extracted from crawling {url}")
+            return []
+        
+        documents = [
+            Document(
+                page_content=result["content"],
                 metadata={
-                    "source": url,
+                    "source": result["url"],
                     "type": "website"
                 }
-            )]
-            
-        # For multiple pages (crawling)
-        else:
-            # Crawl the website
-            crawl_results = crawl_website(url, max_pages=max_pages, max_depth=max_depth)
-            if not crawl_results:
-                logger.warning(f"No content extracted from crawling {url}")
-                return []
-                
-            # Convert results to documents
-            documents = []
-            for result in crawl_results:
-                doc = Document(
-                    page_content=result["content"],
-                    metadata={
-                        "source": result["url"],
-                        "type": "website"
-                    }
-                )
-                documents.append(doc)
-                
-            logger.info(f"Created {len(documents)} documents from website {url}")
-            return documents
+            )
+            for result in crawl_results
+        ]
+        
+        logger.info(f"Created {len(documents)} documents from website {url}")
+        return documents
     except Exception as e:
         logger.error(f"Error converting website to documents: {str(e)}")
-        return []
\ No newline at end of file
+        return []
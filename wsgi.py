@@ -0,0 +1,10 @@
+"""
+Production entry point for app servers, e.g.:
+
+    hypercorn wsgi:app --bind 0.0.0.0:$PORT --workers 4
+    gunicorn -k gevent -w 4 --worker-connections 1000 wsgi:app  (Flask fallback)
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import app